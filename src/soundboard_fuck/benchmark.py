@@ -0,0 +1,290 @@
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+from pydub import AudioSegment
+
+from soundboard_fuck.data.sound import Sound
+from soundboard_fuck.db.sqlitedb import SqliteDb
+from soundboard_fuck.enums import RepressMode
+from soundboard_fuck.player.decoder import decode_file
+from soundboard_fuck.player.output.nulloutput import NullOutput
+from soundboard_fuck.player.pcm_cache import pcm_cache
+from soundboard_fuck.player.transcode_cache import transcode_cache
+from soundboard_fuck.selected_object import SelectedObject
+from soundboard_fuck.state import State
+from soundboard_fuck.ui.panels.sound_panel import SoundPanel
+
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ["wav", "flac", "mp3", "ogg"]
+FRAMES_PER_BUFFER = [1024, 2048, 4096, 8192]
+CACHE_STATES = ["cold", "transcoded", "warm"]
+VOICE_COUNTS = [0, 4, 16]
+TEST_RATE = 44100
+
+
+class ListeningOutput(NullOutput):
+    """A NullOutput that calls listeners with a timestamp after every buffer
+    it has consumed."""
+
+    def __init__(self, realtime: bool = True, rate: int = TEST_RATE, channels: int = 2):
+        super().__init__(realtime=realtime, rate=rate, channels=channels)
+        self.listeners: list[Callable[[float], Any]] = []
+
+    def write(self, data, rate):
+        now = time.perf_counter()
+        super().write(data, rate)
+        for listener in list(self.listeners):
+            listener(now)
+
+
+class BenchmarkDb(SqliteDb):
+    def __init__(self, db_name: str):
+        self.db_name = db_name
+        super().__init__()
+
+
+class HeadlessSoundPanel(SoundPanel):
+    # Everything that would touch curses is a no-op; the playback path is
+    # left untouched.
+    @property
+    def max_y(self) -> int:
+        return 0
+
+    def _render_object_at_pos(self, pos, obj, selected):
+        ...
+
+    def _render_progress(self, pos, progress, sound, selected):
+        ...
+
+    def _render_scrollbar(self):
+        ...
+
+    def redraw(self, force=False):
+        ...
+
+
+def create_test_files(directory: Path, formats: list[str], seconds: float, name: str) -> dict[str, Path]:
+    t = np.arange(int(TEST_RATE * seconds)) / TEST_RATE
+    tone = (np.sin(2 * np.pi * 440 * t) * 0.5 * 32767).astype(np.int16)
+    data = np.repeat(tone[:, np.newaxis], 2, axis=1).tobytes()
+    files: dict[str, Path] = {}
+
+    for fmt in formats:
+        path = directory / f"{name}.{fmt}"
+        try:
+            if fmt == "wav":
+                with wave.open(str(path), "wb") as wf:
+                    wf.setnchannels(2)
+                    wf.setsampwidth(2)
+                    wf.setframerate(TEST_RATE)
+                    wf.writeframes(data)
+            else:
+                segment = AudioSegment(data=data, sample_width=2, frame_rate=TEST_RATE, channels=2)
+                segment.export(str(path), format=fmt)
+            files[fmt] = path
+        except Exception as e:
+            logger.warning("Skipping format %s: %s", fmt, e)
+
+    return files
+
+
+def wait_until(predicate: Callable[[], bool], timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+class Benchmark:
+    def __init__(self, workdir: Path, realtime: bool, keep_open: bool = False, timeout: float = 10.0):
+        self.workdir = workdir
+        self.timeout = timeout
+        self.output = ListeningOutput(realtime=realtime)
+        self.db = BenchmarkDb(str(workdir / "benchmark.sqlite3"))
+        self.db.meta_adapter.update(
+            self.db.meta_adapter.get(),
+            repress_mode=RepressMode.OVERDUB,
+            preload_count=0,
+            keep_output_open=keep_open,
+        )
+        self.category = self.db.get_or_create_default_category()
+        self.state = State(self.db, None)  # type: ignore
+        self.panel = HeadlessSoundPanel(state=self.state, db=self.db, output=self.output)
+
+    def _insert(self, path: Path, seconds: float) -> Sound:
+        return self.db.sound_adapter.insert(
+            Sound(name=path.name, path=path, category_id=self.category.id, duration_ms=int(seconds * 1000))
+        )
+
+    def _prepare_cache(self, sound: Sound, cache_state: str):
+        pcm_cache.clear()
+        transcode_cache.clear()
+        if cache_state == "transcoded" and sound.format != "wav":
+            transcode_cache.get_or_create(sound.path)
+        elif cache_state == "warm":
+            pcm_cache.put(sound.path, self.panel.mixer.conform(decode_file(sound.path)))
+
+    def _stop_all(self):
+        self.panel.stop_all()
+        if not wait_until(lambda: not self.panel.currently_playing, self.timeout):
+            raise TimeoutError("Players did not stop")
+        # Unless it is kept open, every sample should start from a closed
+        # stream, not one that happens to be winding down
+        mixer = self.panel.mixer
+        if mixer.keep_open:
+            return
+        if not wait_until(lambda: not mixer.stream or not mixer.stream.is_active(), self.timeout):
+            raise TimeoutError("Output stream did not stop")
+
+    def measure(self, sound: Sound, background: Sound, cache_state: str, voices: int) -> float:
+        for _ in range(voices):
+            self.panel._play_sound(background)
+        if not wait_until(lambda: all(p.is_playing for p in self.panel.currently_playing), self.timeout):
+            raise TimeoutError("Background voices did not start")
+        self._prepare_cache(sound, cache_state)
+
+        idx, _ = self.panel.sounds.find(sound)
+        self.panel.sounds.explicitly_selected = SelectedObject(idx, sound)
+        first_frame: list[float] = []
+
+        def listener(now: float):
+            if not first_frame and any(
+                p.position > p.start for p in self.panel.currently_playing if p.sound.id == sound.id
+            ):
+                first_frame.append(now)
+
+        self.output.listeners.append(listener)
+        try:
+            start = time.perf_counter()
+            self.panel._on_enter_press()
+            if not wait_until(lambda: bool(first_frame), self.timeout):
+                raise TimeoutError(f"No audio from {sound.path.name}")
+            return (first_frame[0] - start) * 1000
+        finally:
+            self.output.listeners.remove(listener)
+            self._stop_all()
+
+    def run(
+        self,
+        formats: list[str],
+        frames_per_buffer: list[int],
+        cache_states: list[str],
+        voice_counts: list[int],
+        repeat: int,
+    ) -> list[dict[str, Any]]:
+        files = create_test_files(self.workdir, formats, 2.0, "target")
+        background = self._insert(create_test_files(self.workdir, ["wav"], 30.0, "background")["wav"], 30.0)
+        sounds = {fmt: self._insert(path, 2.0) for fmt, path in files.items()}
+        results = []
+
+        for fpb in frames_per_buffer:
+            self.panel.mixer.set_frames_per_buffer(fpb)
+            for fmt, sound in sounds.items():
+                for cache_state in cache_states:
+                    if cache_state == "transcoded" and fmt == "wav":
+                        continue
+                    for voices in voice_counts:
+                        samples = [self.measure(sound, background, cache_state, voices) for _ in range(repeat)]
+                        results.append({
+                            "format": fmt,
+                            "frames_per_buffer": fpb,
+                            "cache": cache_state,
+                            "voices": voices,
+                            "samples_ms": [round(s, 3) for s in samples],
+                            "min_ms": round(min(samples), 3),
+                            "median_ms": round(statistics.median(samples), 3),
+                            "mean_ms": round(statistics.mean(samples), 3),
+                            "max_ms": round(max(samples), 3),
+                        })
+                        logger.info(
+                            "%s fpb=%d cache=%s voices=%d: median %.2f ms",
+                            fmt, fpb, cache_state, voices, statistics.median(samples),
+                        )
+
+        return results
+
+    def close(self):
+        self.panel.cleanup()
+
+
+def parse_int_list(value: str) -> list[int]:
+    return [int(v) for v in value.split(",") if v]
+
+
+def parse_str_list(value: str) -> list[str]:
+    return [v for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Measures the time from SoundPanel._on_enter_press() until the first frame of the sound is handed to "
+            "the audio backend. Runs against a null output, so no sound device is needed."
+        )
+    )
+    parser.add_argument("--formats", type=parse_str_list, default=FORMATS)
+    parser.add_argument("--frames-per-buffer", type=parse_int_list, default=FRAMES_PER_BUFFER)
+    parser.add_argument("--cache", type=parse_str_list, default=CACHE_STATES)
+    parser.add_argument("--voices", type=parse_int_list, default=VOICE_COUNTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--unthrottled",
+        action="store_true",
+        help="Do not pace the null output to real time (background voices will end almost immediately)",
+    )
+    parser.add_argument(
+        "--keep-open",
+        action="store_true",
+        help="Keep the output stream open between sounds, as with the \"keep audio output open\" setting",
+    )
+    parser.add_argument("--output", "-o", help="Write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.INFO)
+
+    with tempfile.TemporaryDirectory(prefix="soundboard-benchmark-") as tmp:
+        workdir = Path(tmp)
+        transcode_cache.set_directory(workdir / "transcoded")
+        benchmark = Benchmark(workdir, realtime=not args.unthrottled, keep_open=args.keep_open)
+        try:
+            results = benchmark.run(args.formats, args.frames_per_buffer, args.cache, args.voices, args.repeat)
+            mixer_stats = benchmark.panel.mixer.stats
+        finally:
+            benchmark.close()
+            transcode_cache.set_directory(None)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "realtime": not args.unthrottled,
+        "keep_open": args.keep_open,
+        "stream_opens": mixer_stats.opens,
+        "mean_stream_open_ms": round(mixer_stats.mean_open_ms or 0.0, 3),
+        "warm_starts": mixer_stats.warm_starts,
+        "mixer_rate": TEST_RATE,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        Path(args.output).write_text(output + "\n", encoding="utf-8")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
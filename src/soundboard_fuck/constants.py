@@ -34,3 +34,31 @@ SOUND_EXTENSIONS = [
     "tta",
     "wav",
 ]
+
+PCM_CACHE_MAX_SIZE = 256 * pow(2, 20)
+TRANSCODE_CACHE_MAX_SIZE = 4 * pow(2, 30)
+PRELOAD_COUNT = 10
+# Sounds written per transaction when importing
+IMPORT_BATCH_SIZE = 200
+# Sounds whose transcoding results are written per transaction
+TRANSCODE_BATCH_SIZE = 50
+# Times a sound is tried by the conversion job before it is left alone
+TRANSCODE_MAX_ATTEMPTS = 3
+PRELOAD_MAX_SIZE = 64 * pow(2, 20)
+MAX_POLYPHONY = 16
+# Finished players kept around for reuse
+FREE_VOICES_MAX = 64
+LOUDNESS_TARGET = -18.0
+SILENCE_THRESHOLD = -50.0
+SILENCE_PADDING_MS = 10
+# Resolution of the stored waveform summary of every sound
+WAVEFORM_BUCKETS = 256
+# Times per second the progress bars are updated while sounds are playing
+PROGRESS_TICK_RATE = 30
+# Length of the ramps applied when a playing sound is stopped or restarted
+FADE_MS = 10
+# Non-WAV sounds at least this long are streamed from ffmpeg instead of
+# being decoded in full before playing
+STREAM_MIN_DURATION_MS = 30_000
+STREAM_BUFFER_SECONDS = 5
+STREAM_CHUNK_FRAMES = 4096
@@ -0,0 +1,122 @@
+import logging
+import os
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from typing import TYPE_CHECKING
+
+from soundboard_fuck.constants import (
+    TRANSCODE_BATCH_SIZE,
+    TRANSCODE_MAX_ATTEMPTS,
+)
+from soundboard_fuck.enums import TranscodeState
+from soundboard_fuck.player.transcode_cache import (
+    TranscodeCache,
+    transcode_cache,
+    transcode_file,
+)
+from soundboard_fuck.utils import get_mp_context
+
+
+if TYPE_CHECKING:
+    from soundboard_fuck.data.sound import Sound
+    from soundboard_fuck.db.abstractdb import AbstractDb
+    from soundboard_fuck.jobs import Job, JobManager
+
+
+logger = logging.getLogger(__name__)
+
+CONVERSION_JOB_TITLE = "Converting to WAV"
+
+
+def needs_transcoding(sound: "Sound") -> bool:
+    # A sound that is done stays done, also if its entry has been evicted
+    # since: the cache may well be smaller than the library, and the player
+    # transcodes evicted sounds again when they are played
+    if sound.format == "wav" or sound.transcode_state == TranscodeState.DONE:
+        return False
+    return sound.transcode_attempts < TRANSCODE_MAX_ATTEMPTS
+
+
+def run_conversion_job(
+    job: "Job",
+    db: "AbstractDb",
+    cache: TranscodeCache = transcode_cache,
+    jobs: int | None = None,
+    batch_size: int = TRANSCODE_BATCH_SIZE,
+):
+    """Job target for JobManager: transcodes every sound that is not a WAV
+    into the cache, in a pool of worker processes. Every sound's outcome is
+    stored with it, TRANSCODE_BATCH_SIZE sounds per transaction, so an
+    interrupted run picks up where it left off, and files that could not be
+    transcoded are tried again by later runs, at most TRANSCODE_MAX_ATTEMPTS
+    times in all (until they change)."""
+    sounds = [s for s in db.list_sounds() if needs_transcoding(s)]
+    job.set_progress(0, len(sounds))
+    if not sounds:
+        return
+
+    jobs = jobs or os.cpu_count() or 1
+    directory = cache.directory
+    results: list[tuple[int, TranscodeState, str | None]] = []
+    pending: "dict[Future[str], Sound]" = {}
+    queue = iter(sounds)
+    exhausted = False
+    done = 0
+    converted = 0
+
+    def flush():
+        if results:
+            db.sound_adapter.set_transcode_states(results)
+            results.clear()
+            cache.evict()
+
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=get_mp_context()) as executor:
+        try:
+            while True:
+                while not exhausted and len(pending) < jobs * 2 and not job.is_cancelled:
+                    sound = next(queue, None)
+                    if sound is None:
+                        exhausted = True
+                    else:
+                        pending[executor.submit(transcode_file, directory, sound.path, sound.fingerprint)] = sound
+                if not pending:
+                    break
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    sound = pending.pop(future)
+                    assert sound.id is not None
+                    try:
+                        fingerprint = future.result()
+                        cache.add_entry(fingerprint)
+                        results.append((sound.id, TranscodeState.DONE, fingerprint))
+                        converted += 1
+                    except Exception as e:
+                        logger.error("Could not transcode %s: %s", sound.path.name, e)
+                        job.add_error(f"{sound.path.name}: {e}")
+                        results.append((sound.id, TranscodeState.FAILED, None))
+                    done += 1
+                if len(results) >= batch_size:
+                    flush()
+                job.set_progress(done)
+                if job.is_cancelled:
+                    for future in pending:
+                        future.cancel()
+                    pending = {f: s for f, s in pending.items() if not f.cancelled()}
+        finally:
+            flush()
+
+    job.summary = f"{converted} of {len(sounds)} sounds converted"
+
+
+def submit_conversion_job(job_manager: "JobManager", db: "AbstractDb") -> "Job":
+    """Submits run_conversion_job(), unless a conversion job is already
+    queued or running, in which case that one is returned. Every run covers
+    the whole library, so there is no point in queueing another."""
+    job = job_manager.find(CONVERSION_JOB_TITLE)
+    if job is None:
+        job = job_manager.submit(CONVERSION_JOB_TITLE, lambda job: run_conversion_job(job, db))
+    return job
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+from soundboard_fuck.data.model import Model
+
+
+@dataclass
+class ManifestEntry(Model):
+    # A file in a synced directory, as it was when last synced
+    root: Path
+    path: Path
+    size: int
+    mtime_ns: int
+    fingerprint: str | None = None
+    sound_id: int | None = None
+    id: int | None = None
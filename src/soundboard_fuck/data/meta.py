@@ -1,7 +1,12 @@
 from dataclasses import dataclass
 
+from soundboard_fuck.constants import (
+    MAX_POLYPHONY,
+    PRELOAD_COUNT,
+    PRELOAD_MAX_SIZE,
+)
 from soundboard_fuck.data.model import Model
-from soundboard_fuck.enums import RepressMode
+from soundboard_fuck.enums import RepressMode, VoiceStealing
 
 
 @dataclass
@@ -9,5 +14,10 @@ class Meta(Model):
     db_version: int
     repress_mode: RepressMode = RepressMode.STOP
     convert_to_wav: bool = False
+    preload_count: int = PRELOAD_COUNT
+    preload_max_size: int = PRELOAD_MAX_SIZE
+    max_polyphony: int = MAX_POLYPHONY
+    voice_stealing: VoiceStealing = VoiceStealing.OLDEST
+    keep_output_open: bool = False
     default_category: int | None = None
     id: int | None = None
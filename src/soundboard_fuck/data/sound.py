@@ -1,11 +1,13 @@
+import sys
 from dataclasses import dataclass, field
 from pathlib import Path
 
-from pydub import AudioSegment
-
+from soundboard_fuck.constants import LOUDNESS_TARGET
 from soundboard_fuck.data.model import Model
+from soundboard_fuck.enums import TranscodeState
+from soundboard_fuck.player.probe import probe_duration_ms
 from soundboard_fuck.ui.colors import ColorScheme
-from soundboard_fuck.utils import get_local_sounds_dir, str_to_floats
+from soundboard_fuck.utils import str_to_floats
 
 
 @dataclass
@@ -17,6 +19,16 @@ class Sound(Model):
     duration_ms: int | None = None
     id: int | None = None
     play_count: int = 0
+    loudness: float | None = None
+    peak: float | None = None
+    sample_rate: int | None = None
+    start_frame: int | None = None
+    end_frame: int | None = None
+    waveform: bytes | None = None
+    fingerprint: str | None = None
+    # Whether the sound has been transcoded to the WAV cache; None if not tried
+    transcode_state: TranscodeState | None = None
+    transcode_attempts: int = 0
 
     format: str = field(init=False)
     name_floats: tuple[float, float] = field(init=False)
@@ -25,6 +37,24 @@ class Sound(Model):
     def duration_seconds(self) -> float | None:
         return self.duration_ms / 1000 if self.duration_ms is not None else None
 
+    @property
+    def audible_duration_ms(self) -> int | None:
+        # Duration without the leading and trailing silence
+        if self.start_frame is not None and self.end_frame is not None and self.sample_rate:
+            return int((self.end_frame - self.start_frame) * 1000 / self.sample_rate)
+        return self.duration_ms
+
+    @property
+    def gain(self) -> float:
+        # Linear gain that brings the sound to LOUDNESS_TARGET, but never so
+        # much that its peak would clip
+        if self.loudness is None:
+            return 1.0
+        gain_db = LOUDNESS_TARGET - self.loudness
+        if self.peak is not None:
+            gain_db = min(gain_db, -self.peak)
+        return pow(10, gain_db / 20)
+
     @property
     def list_fields(self):
         return self.colors, self.name
@@ -32,30 +62,27 @@ class Sound(Model):
     def __hash__(self):
         return self.id
 
+    def get_frame_range(self, rate: int, frame_count: int | None) -> tuple[int, int]:
+        # Start and end frame of the audible part, for a decoded version of
+        # the sound with `rate` and `frame_count` (None if not known yet)
+        if frame_count is None:
+            frame_count = sys.maxsize
+        if self.start_frame is None or self.end_frame is None or not self.sample_rate:
+            return 0, frame_count
+        ratio = rate / self.sample_rate
+        start = min(int(self.start_frame * ratio), frame_count)
+        end = min(round(self.end_frame * ratio), frame_count)
+        if end <= start:
+            return 0, frame_count
+        return start, end
+
     def __post_init__(self):
         self.name_floats = str_to_floats(self.name)
         self.format = self.path.suffix.strip(".").lower()
 
-    def copy_to_wav(self):
-        segment: AudioSegment = AudioSegment.from_file(file=self.path, format=self.format)
-        path = Sound.get_final_path(self.path, True)
-        with path.open("wb") as f:
-            segment.export(f.name, "wav")
-        return path
-
     @staticmethod
     def extract_duration_ms(path: Path) -> int | None:
-        segment: AudioSegment = AudioSegment.from_file(file=path, format=path.suffix.strip(".").lower())
-        if isinstance(segment.duration_seconds, (float, int)):
-            return int(segment.duration_seconds * 1000)
-        return None
-
-    @staticmethod
-    def get_final_path(path: Path, convert_to_wav: bool) -> Path:
-        if path.suffix.strip(".").lower() != "wav" and convert_to_wav:
-            filename = path.stem + ".wav"
-            return get_local_sounds_dir() / filename
-        return path
+        return probe_duration_ms(path)
 
 
 def get_test_sounds(category_id: int):
@@ -38,11 +38,6 @@ class AbstractDb(ABC):
     def set_default_category(self, category_id: int | None):
         ...
 
-    def copy_sound_to_wav(self, sound: "Sound"):
-        if sound.format != "wav":
-            new_path = sound.copy_to_wav()
-            self.sound_adapter.update(sound, path=new_path)
-
     def get_default_category(self) -> "Category | None":
         for category in self.list_categories():
             if category.is_default:
@@ -61,18 +56,12 @@ class AbstractDb(ABC):
         return self.category_adapter.get(id=category.id)
 
     def insert_sound(self, path: Path, category_id: int | None = None) -> "Sound":
-        from soundboard_fuck.data.sound import Sound
+        from soundboard_fuck.importer import build_sound
 
         if category_id is None:
             category_id = self.get_or_create_default_category().id
-        return self.sound_adapter.insert(
-            Sound(
-                name=path.stem,
-                path=path,
-                category_id=category_id,
-                duration_ms=Sound.extract_duration_ms(path),
-            )
-        )
+        assert category_id is not None
+        return self.sound_adapter.insert(build_sound(path, category_id))
 
     def list_categories_with_sounds(self, query: str = "") -> "list[CategoryWithSounds]":
         if query:
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Generic
+from typing import Any, Generic
 
 from soundboard_fuck.data.model import _M
 
@@ -8,7 +8,11 @@ class DbAdapter(Generic[_M], ABC):
     table_name: str
 
     @abstractmethod
-    def bulk_insert(self, records: list[_M]):
+    def bulk_insert(self, records: list[_M]) -> list[_M]:
+        ...
+
+    @abstractmethod
+    def bulk_update(self, updates: list[tuple[_M, dict[str, Any]]]):
         ...
 
     @abstractmethod
@@ -1,5 +1,5 @@
 from abc import ABC
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from soundboard_fuck.data.model import _M
 from soundboard_fuck.db.base.adapter import DbAdapter
@@ -17,9 +17,14 @@ class DummyAdapter(DbAdapter[_M], ABC):
         self.records = []
         super().__init__()
 
-    def bulk_insert(self, records: list[_M]):
+    def bulk_insert(self, records: list[_M]) -> list[_M]:
         self.records += records
         self.db.notify_listeners(self.table_name)
+        return []
+
+    def bulk_update(self, updates: list[tuple[_M, dict[str, Any]]]):
+        for record, changes in updates:
+            self.update(record, **changes)
 
     def delete(self, **where):
         for r in self.records:
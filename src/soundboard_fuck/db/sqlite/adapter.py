@@ -43,6 +43,10 @@ class SqliteAdapter(DbAdapter[_M], ABC):
         values = ", ".join(f":{c}" for c in column_names)
         return f"INSERT INTO {self.table_name} ({columns}) VALUES ({values})"
 
+    def _get_update_stmt(self, names: list[str]) -> str:
+        updates = ", ".join(f"`{name}`=:{name}" for name in names)
+        return f"UPDATE {self.table_name} SET {updates} WHERE id = :id"
+
     def _get_order_by_stmt(self, order_by: list[str] | None) -> str:
         if order_by:
             return "ORDER BY " + ", ".join(order_by)
@@ -91,9 +95,29 @@ class SqliteAdapter(DbAdapter[_M], ABC):
     def _trim(self, value: str) -> str:
         return re.sub(r" {2,}", " ", value.strip().replace("\n", " "))
 
-    def bulk_insert(self, records: list[_M]):
-        parameters = [self._record_to_parameters(r) for r in records]
-        self.db.executemany(self._get_insert_stmt(), parameters)
+    def bulk_insert(self, records: list[_M]) -> list[_M]:
+        # All in one transaction. Records that violate a constraint, such as
+        # a unique index, are left out and returned instead of failing the
+        # whole batch.
+        sql = self._get_insert_stmt()
+        rejected: list[_M] = []
+        with self.db.transaction() as con:
+            for record in records:
+                try:
+                    con.execute(sql, self._record_to_parameters(record))
+                except sqlite3.IntegrityError:
+                    rejected.append(record)
+        self.db.notify_listeners(self.table_name)
+        return rejected
+
+    def bulk_update(self, updates: list[tuple[_M, dict[str, Any]]]):
+        # (record, changes) pairs, all in one transaction
+        with self.db.transaction() as con:
+            for record, changes in updates:
+                changes = {k: v for k, v in changes.items() if getattr(record, k) != v}
+                if changes:
+                    parameters = {k: self.column_dict[k].value_to_sql(v) for k, v in changes.items()}
+                    con.execute(self._get_update_stmt(list(changes)), {**parameters, "id": record.id})
         self.db.notify_listeners(self.table_name)
 
     def create_table(self):
@@ -0,0 +1,65 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, TypedDict
+
+from soundboard_fuck.db.sqlite.adapter import SqliteAdapter
+from soundboard_fuck.db.sqlite.sql_column import (
+    ForeignKeyAction,
+    SqlColumn,
+    SqlType,
+)
+from soundboard_fuck.db.sqlite.wrappers import FetchAllWrapper
+
+
+if TYPE_CHECKING:
+    from soundboard_fuck.data.manifest_entry import ManifestEntry
+
+
+class ManifestColumns(TypedDict):
+    id: SqlColumn[int | None]
+    root: SqlColumn[Path]
+    path: SqlColumn[Path]
+    size: SqlColumn[int]
+    mtime_ns: SqlColumn[int]
+    fingerprint: SqlColumn[str | None]
+    sound_id: SqlColumn[int | None]
+
+
+class ManifestAdapter(SqliteAdapter["ManifestEntry"]):
+    table_name = "manifest"
+    column_dict: ManifestColumns = {
+        "id": SqlColumn[int | None]("id", SqlType.INTEGER, primary_key=True, auto_increment=True),
+        "root": SqlColumn[Path]("root", SqlType.VARCHAR, Path, not_null=True),
+        "path": SqlColumn[Path]("path", SqlType.VARCHAR, Path, not_null=True),
+        "size": SqlColumn[int]("size", SqlType.INTEGER, not_null=True),
+        "mtime_ns": SqlColumn[int]("mtime_ns", SqlType.INTEGER, not_null=True),
+        "fingerprint": SqlColumn[str | None]("fingerprint", SqlType.VARCHAR, default=None),
+        "sound_id": SqlColumn[int | None](
+            "sound_id",
+            SqlType.INTEGER,
+            default=None,
+            references=("sounds", "id"),
+            on_delete=ForeignKeyAction.SET_NULL,
+        ),
+    }
+
+    def _get_model_class(self):
+        from soundboard_fuck.data.manifest_entry import ManifestEntry
+        return ManifestEntry
+
+    def create_table(self):
+        super().create_table()
+        self.db.execute("CREATE UNIQUE INDEX IF NOT EXISTS manifest_root_path ON manifest(root, path)")
+
+    def get_upsert_stmt(self) -> str:
+        # An entry is identified by (root, path), which has a unique index
+        return self._get_insert_stmt().replace("INSERT INTO", "INSERT OR REPLACE INTO", 1)
+
+    def list_for_root(self, root: Path) -> "list[ManifestEntry]":
+        sql = self._get_select_stmt(where="WHERE manifest.root = ?")
+        with FetchAllWrapper["ManifestEntry"](
+            self.db.db_name,
+            sql,
+            (str(root),),
+            row_factory=self._record_factory,
+        ) as records:
+            return records
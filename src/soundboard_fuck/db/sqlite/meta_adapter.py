@@ -1,12 +1,17 @@
 from typing import TYPE_CHECKING, TypedDict
 
+from soundboard_fuck.constants import (
+    MAX_POLYPHONY,
+    PRELOAD_COUNT,
+    PRELOAD_MAX_SIZE,
+)
 from soundboard_fuck.db.sqlite.adapter import SqliteAdapter
 from soundboard_fuck.db.sqlite.sql_column import (
     ForeignKeyAction,
     SqlColumn,
     SqlType,
 )
-from soundboard_fuck.enums import RepressMode
+from soundboard_fuck.enums import RepressMode, VoiceStealing
 
 
 if TYPE_CHECKING:
@@ -18,6 +23,12 @@ class MetaColumns(TypedDict):
     db_version: SqlColumn[int]
     default_category: SqlColumn[int | None]
     repress_mode: SqlColumn[RepressMode]
+    convert_to_wav: SqlColumn[bool]
+    preload_count: SqlColumn[int]
+    preload_max_size: SqlColumn[int]
+    max_polyphony: SqlColumn[int]
+    voice_stealing: SqlColumn[VoiceStealing]
+    keep_output_open: SqlColumn[bool]
 
 
 class MetaAdapter(SqliteAdapter["Meta"]):
@@ -40,6 +51,17 @@ class MetaAdapter(SqliteAdapter["Meta"]):
             default=RepressMode.STOP
         ),
         SqlColumn[bool](name="convert_to_wav", sql_type=SqlType.INTEGER, type_=bool, default=False, not_null=True),
+        SqlColumn[int](name="preload_count", sql_type=SqlType.INTEGER, default=PRELOAD_COUNT, not_null=True),
+        SqlColumn[int](name="preload_max_size", sql_type=SqlType.INTEGER, default=PRELOAD_MAX_SIZE, not_null=True),
+        SqlColumn[int](name="max_polyphony", sql_type=SqlType.INTEGER, default=MAX_POLYPHONY, not_null=True),
+        SqlColumn[VoiceStealing](
+            name="voice_stealing",
+            type_=VoiceStealing,
+            sql_type=SqlType.VARCHAR,
+            not_null=True,
+            default=VoiceStealing.OLDEST,
+        ),
+        SqlColumn[bool](name="keep_output_open", sql_type=SqlType.INTEGER, type_=bool, default=False, not_null=True),
     ]
     column_dict: MetaColumns = {c.name: c for c in columns}
 
@@ -1,7 +1,8 @@
 import logging
 import sqlite3
+from contextlib import contextmanager
 from enum import Enum
-from typing import Any, TypeVar
+from typing import Any, Iterator, TypeVar
 
 from soundboard_fuck.db.sqlite.sql_column import SqlType
 from soundboard_fuck.db.sqlite.wrappers import FetchOneWrapper
@@ -38,6 +39,21 @@ class SqliteMixin:
         finally:
             con.close()
 
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        # Everything executed on the yielded connection is committed at the
+        # end of the block, or not at all
+        con = sqlite3.connect(self.db_name)
+
+        try:
+            with con:
+                yield con
+        except Exception as e:
+            logger.error(str(e))
+            raise e
+        finally:
+            con.close()
+
     def get_last_insert_rowid(self) -> int | None:
         with FetchOneWrapper(self.db_name, "SELECT last_insert_rowid()") as row:
             if row:
@@ -7,6 +7,8 @@ from soundboard_fuck.db.sqlite.sql_column import (
     SqlColumn,
     SqlType,
 )
+from soundboard_fuck.db.sqlite.wrappers import FetchAllWrapper
+from soundboard_fuck.enums import TranscodeState
 from soundboard_fuck.ui.colors import ColorScheme
 
 
@@ -22,6 +24,15 @@ class SoundColumns(TypedDict):
     duration_ms: SqlColumn[int | None]
     colors: SqlColumn[ColorScheme]
     play_count: SqlColumn[int]
+    loudness: SqlColumn[float | None]
+    peak: SqlColumn[float | None]
+    sample_rate: SqlColumn[int | None]
+    start_frame: SqlColumn[int | None]
+    end_frame: SqlColumn[int | None]
+    waveform: SqlColumn[bytes | None]
+    fingerprint: SqlColumn[str | None]
+    transcode_state: SqlColumn[TranscodeState | None]
+    transcode_attempts: SqlColumn[int]
 
 
 class SoundAdapter(SqliteAdapter["Sound"]):
@@ -45,12 +56,64 @@ class SoundAdapter(SqliteAdapter["Sound"]):
             select_stmt="categories.colors",
         ),
         "duration_ms": SqlColumn[int | None]("duration_ms", SqlType.INTEGER, default=None),
+        "loudness": SqlColumn[float | None]("loudness", SqlType.REAL, default=None),
+        "peak": SqlColumn[float | None]("peak", SqlType.REAL, default=None),
+        "sample_rate": SqlColumn[int | None]("sample_rate", SqlType.INTEGER, default=None),
+        "start_frame": SqlColumn[int | None]("start_frame", SqlType.INTEGER, default=None),
+        "end_frame": SqlColumn[int | None]("end_frame", SqlType.INTEGER, default=None),
+        "waveform": SqlColumn[bytes | None]("waveform", SqlType.BLOB, default=None),
+        "fingerprint": SqlColumn[str | None]("fingerprint", SqlType.VARCHAR, default=None),
+        "transcode_state": SqlColumn[TranscodeState | None](
+            "transcode_state",
+            SqlType.VARCHAR,
+            TranscodeState,
+            default=None,
+        ),
+        "transcode_attempts": SqlColumn[int]("transcode_attempts", SqlType.INTEGER, default=0, not_null=True),
         "id": SqlColumn[int | None]("id", SqlType.INTEGER, primary_key=True, auto_increment=True),
         "name": SqlColumn[str]("name", SqlType.VARCHAR, not_null=True),
         "path": SqlColumn[Path]("path", SqlType.VARCHAR, Path, not_null=True),
         "play_count": SqlColumn[int]("play_count", SqlType.INTEGER, default=0, not_null=True),
     }
 
+    def create_indexes(self):
+        # Paths are stored normalized, so this makes for one sound per file
+        self.db.execute("CREATE UNIQUE INDEX IF NOT EXISTS sounds_path ON sounds(path)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS sounds_fingerprint ON sounds(fingerprint)")
+
+    def create_table(self):
+        super().create_table()
+        self.create_indexes()
+
+    def list_most_played(self, count: int) -> "list[Sound]":
+        # Sounds that have been played at all, most played first
+        sql = self._get_select_stmt(
+            where="WHERE sounds.play_count > 0",
+            order_by="ORDER BY sounds.play_count DESC LIMIT ?",
+        )
+        with FetchAllWrapper["Sound"](self.db.db_name, sql, (count,), row_factory=self._record_factory) as records:
+            return records
+
+    def list_keys(self) -> list[tuple[int, Path, str | None]]:
+        # Just what duplicate checks need, without loading every sound
+        sql = "SELECT id, path, fingerprint FROM sounds"
+        column = self.column_dict["fingerprint"]
+        with FetchAllWrapper[tuple](self.db.db_name, sql) as rows:
+            return [(sound_id, Path(path), column.sql_to_value(fingerprint)) for sound_id, path, fingerprint in rows]
+
+    def set_fingerprints(self, fingerprints: dict[int, str]):
+        parameters = [(fingerprint, sound_id) for sound_id, fingerprint in fingerprints.items()]
+        self.db.executemany("UPDATE sounds SET fingerprint = ? WHERE id = ?", parameters)
+
+    def set_transcode_states(self, states: list[tuple[int, TranscodeState, str | None]]):
+        # (sound id, state, fingerprint); a None fingerprint keeps the old one
+        parameters = [(state.name, fingerprint, sound_id) for sound_id, state, fingerprint in states]
+        self.db.executemany(
+            "UPDATE sounds SET transcode_state = ?, transcode_attempts = transcode_attempts + 1, "
+            "fingerprint = COALESCE(?, fingerprint) WHERE id = ?",
+            parameters,
+        )
+
     def _get_model_class(self):
         from soundboard_fuck.data.sound import Sound
         return Sound
@@ -82,7 +82,7 @@ class SqlColumn(Generic[_T]):
         return self.select_stmt or self.name
 
     def sql_to_value(self, sql: Any) -> _T:
-        if sql == "NULL":
+        if sql is None or sql == "NULL":
             return None
         if issubclass(self.type_, enum.Enum):
             # pylint: disable=unsubscriptable-object
@@ -1,36 +1,54 @@
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
+
 from soundboard_fuck.data.category import Category
 from soundboard_fuck.data.meta import Meta
 from soundboard_fuck.db.abstractdb import AbstractDb
 from soundboard_fuck.db.sqlite.category_adapter import CategoryAdapter
 from soundboard_fuck.db.sqlite.comparison import Like
+from soundboard_fuck.db.sqlite.manifest_adapter import ManifestAdapter
 from soundboard_fuck.db.sqlite.meta_adapter import MetaAdapter
 from soundboard_fuck.db.sqlite.mixin import SqliteMixin
 from soundboard_fuck.db.sqlite.sound_adapter import SoundAdapter
+from soundboard_fuck.utils import normalize_path
+
+
+if TYPE_CHECKING:
+    from soundboard_fuck.sync import SyncChanges
+
+
+logger = logging.getLogger(__name__)
 
 
 class SqliteDb(SqliteMixin, AbstractDb):
     db_name = "soundboard.sqlite3"
-    db_version = 10
+    db_version = 21
     category_adapter: CategoryAdapter
     sound_adapter: SoundAdapter
     meta_adapter: MetaAdapter
+    manifest_adapter: ManifestAdapter
 
     def __init__(self):
         super().__init__()
         self.category_adapter = CategoryAdapter(self)
         self.sound_adapter = SoundAdapter(self)
         self.meta_adapter = MetaAdapter(self)
+        self.manifest_adapter = ManifestAdapter(self)
         actual_version = self.check_actual_version()
         if actual_version != self.db_version:
             cat_version = actual_version
             sound_version = actual_version
             meta_version = actual_version
+            manifest_version = actual_version
             while cat_version < self.db_version:
                 cat_version = self.migrate_categories(cat_version)
             while sound_version < self.db_version:
                 sound_version = self.migrate_sounds(sound_version)
             while meta_version < self.db_version:
                 meta_version = self.migrate_meta(meta_version)
+            while manifest_version < self.db_version:
+                manifest_version = self.migrate_manifest(manifest_version)
             try:
                 meta = self.meta_adapter.get()
                 self.meta_adapter.update(meta, db_version=self.db_version)
@@ -38,6 +56,26 @@ class SqliteDb(SqliteMixin, AbstractDb):
                 self.meta_adapter.insert(Meta(db_version=self.db_version))
             self.get_or_create_default_category()
 
+    def apply_sync(self, changes: "SyncChanges"):
+        sounds = self.sound_adapter
+        with self.transaction() as con:
+            insert_stmt = sounds._get_insert_stmt()
+            for sound, entry in changes.new:
+                entry.sound_id = con.execute(insert_stmt, sounds._record_to_parameters(sound)).lastrowid
+            for sound_id, fields in changes.updated.items():
+                parameters = {name: sounds.column_dict[name].value_to_sql(value) for name, value in fields.items()}
+                con.execute(sounds._get_update_stmt(list(fields)), {**parameters, "id": sound_id})
+            con.executemany("DELETE FROM sounds WHERE id = ?", [(i,) for i in changes.deleted_sounds])
+            con.executemany("DELETE FROM manifest WHERE id = ?", [(i,) for i in changes.deleted_manifest])
+            con.executemany(
+                self.manifest_adapter.get_upsert_stmt(),
+                [
+                    self.manifest_adapter._record_to_parameters(entry)
+                    for entry in [*changes.manifest, *(e for _, e in changes.new)]
+                ],
+            )
+        self.notify_listeners("sounds")
+
     def check_actual_version(self) -> int:
         try:
             return self.meta_adapter.get_column(self.meta_adapter.column_dict["db_version"])
@@ -94,7 +132,60 @@ class SqliteDb(SqliteMixin, AbstractDb):
 
         return self.db_version
 
+    def migrate_manifest(self, from_version: int) -> int:
+        if from_version < 18:
+            self.manifest_adapter.create_table()
+        return self.db_version
+
     def migrate_sounds(self, from_version: int) -> int:
+        if from_version == 20:
+            self.set_aside_duplicate_sounds()
+            self.execute("DROP INDEX IF EXISTS sounds_path")
+            self.sound_adapter.create_indexes()
+            return 21
+
+        if from_version == 19:
+            stmt = self.sound_adapter.get_column_definition("transcode_attempts").create_stmt()
+            self.execute(f"ALTER TABLE sounds ADD COLUMN {stmt}")
+            return 20
+
+        if from_version == 18:
+            stmt = self.sound_adapter.get_column_definition("transcode_state").create_stmt()
+            self.execute(f"ALTER TABLE sounds ADD COLUMN {stmt}")
+            return 19
+
+        if from_version == 17:
+            return 18
+
+        if from_version == 16:
+            # The indexes are created in the migration to 21
+            stmt = self.sound_adapter.get_column_definition("fingerprint").create_stmt()
+            self.execute(f"ALTER TABLE sounds ADD COLUMN {stmt}")
+            return 17
+
+        if from_version == 15:
+            stmt = self.sound_adapter.get_column_definition("waveform").create_stmt()
+            self.execute(f"ALTER TABLE sounds ADD COLUMN {stmt}")
+            return 16
+
+        if from_version == 14:
+            return 15
+
+        if from_version == 13:
+            for name in ("sample_rate", "start_frame", "end_frame"):
+                stmt = self.sound_adapter.get_column_definition(name).create_stmt()
+                self.execute(f"ALTER TABLE sounds ADD COLUMN {stmt}")
+            return 14
+
+        if from_version == 12:
+            for name in ("loudness", "peak"):
+                stmt = self.sound_adapter.get_column_definition(name).create_stmt()
+                self.execute(f"ALTER TABLE sounds ADD COLUMN {stmt}")
+            return 13
+
+        if 3 <= from_version < 12:
+            return 12
+
         if from_version == 2:
             sounds = self.list_sounds()
             categories = self.list_categories()
@@ -117,6 +208,30 @@ class SqliteDb(SqliteMixin, AbstractDb):
         return self.db_version
 
     def migrate_meta(self, from_version: int) -> int:
+        if 15 <= from_version < 21:
+            return 21
+
+        if from_version == 14:
+            column = self.meta_adapter.get_column_definition("keep_output_open")
+            stmt = column.create_stmt()
+            self.execute(f"ALTER TABLE meta ADD COLUMN {stmt}")
+            return 15
+
+        if 12 <= from_version < 14:
+            return 14
+
+        if from_version == 11:
+            for name in ("max_polyphony", "voice_stealing"):
+                stmt = self.meta_adapter.get_column_definition(name).create_stmt()
+                self.execute(f"ALTER TABLE meta ADD COLUMN {stmt}")
+            return 12
+
+        if from_version == 10:
+            for name in ("preload_count", "preload_max_size"):
+                stmt = self.meta_adapter.get_column_definition(name).create_stmt()
+                self.execute(f"ALTER TABLE meta ADD COLUMN {stmt}")
+            return 11
+
         if from_version == 9:
             column = self.meta_adapter.get_column_definition("convert_to_wav")
             stmt = column.create_stmt()
@@ -161,6 +276,37 @@ class SqliteDb(SqliteMixin, AbstractDb):
 
         return self.db_version
 
+    def set_aside_duplicate_sounds(self):
+        # Normalizes the path of every sound, so that the path can be unique.
+        # Sounds that turn out to share a path with an older one are moved,
+        # untouched, to the duplicate_sounds table (with the id of the sound
+        # that was kept in duplicate_of), from where they can be recovered.
+        with self.transaction() as con:
+            kept: dict[Path, tuple[int, str]] = {}
+            duplicates: list[tuple[int, int]] = []
+            for sound_id, name, path in con.execute("SELECT id, name, path FROM sounds ORDER BY id"):
+                key = normalize_path(Path(path))
+                if key in kept:
+                    kept_id, kept_name = kept[key]
+                    logger.warning(
+                        "Sound %r (id %d) has the same file as %r (id %d), %s; moving it to duplicate_sounds",
+                        name, sound_id, kept_name, kept_id, key,
+                    )
+                    duplicates.append((kept_id, sound_id))
+                else:
+                    kept[key] = (sound_id, name)
+            if duplicates:
+                con.execute(
+                    "CREATE TABLE IF NOT EXISTS duplicate_sounds AS "
+                    "SELECT *, NULL AS duplicate_of FROM sounds WHERE 0"
+                )
+                con.executemany("INSERT INTO duplicate_sounds SELECT *, ? FROM sounds WHERE id = ?", duplicates)
+                con.executemany("DELETE FROM sounds WHERE id = ?", [(i,) for _, i in duplicates])
+            con.executemany(
+                "UPDATE sounds SET path = ? WHERE id = ?",
+                [(str(path), sound_id) for path, (sound_id, _) in kept.items()],
+            )
+
     def set_default_category(self, category_id):
         meta = self.meta_adapter.get()
         if self.meta_adapter.update(meta, default_category=category_id):
@@ -5,3 +5,20 @@ class RepressMode(enum.Enum):
     STOP = "Stop"
     RESTART = "Restart"
     OVERDUB = "Overdub"
+
+
+class VoiceStealing(enum.Enum):
+    OLDEST = "Oldest"
+    QUIETEST = "Quietest"
+    SAME_SOUND = "Same sound first"
+
+
+class TranscodeState(enum.Enum):
+    DONE = "Done"
+    FAILED = "Failed"
+
+
+class DuplicatePolicy(enum.Enum):
+    NONE = "none"
+    PATH = "path"
+    CONTENT = "content"
@@ -0,0 +1,268 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterable
+
+from soundboard_fuck.constants import IMPORT_BATCH_SIZE
+from soundboard_fuck.data.sound import Sound
+from soundboard_fuck.enums import DuplicatePolicy
+from soundboard_fuck.player.analysis import analyze_file
+from soundboard_fuck.utils import get_mp_context, hash_file, normalize_path
+
+
+if TYPE_CHECKING:
+    from soundboard_fuck.db.abstractdb import AbstractDb
+    from soundboard_fuck.jobs import Job
+
+
+logger = logging.getLogger(__name__)
+
+# Fingerprints of the sounds already in the library; set in every worker
+# process when importing with DuplicatePolicy.CONTENT
+_known_fingerprints: frozenset[str] = frozenset()
+
+
+@dataclass
+class ImportStats:
+    # `total` is only known if the importer was given a list of paths
+    total: int | None = None
+    submitted: int = 0
+    analyzed: int = 0
+    imported: int = 0
+    skipped: int = 0
+    # Analyzed, but turned away by the database: already in the library
+    rejected: int = 0
+    failed: int = 0
+    errors: list[tuple[Path, str]] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+    finished: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def files_per_second(self) -> float:
+        processed = self.analyzed + self.failed
+        return processed / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _set_known_fingerprints(fingerprints: frozenset[str]):
+    global _known_fingerprints
+    _known_fingerprints = fingerprints
+
+
+def build_sound(path: Path, category_id: int, fingerprint: str | None = None) -> Sound:
+    # Everything that needs the file: runs in a worker process when importing.
+    # The file is decoded for the analysis anyway, so that is where the
+    # duration comes from, rather than from a separate probe.
+    analysis = analyze_file(path)
+    return Sound(
+        name=path.stem,
+        path=normalize_path(path),
+        category_id=category_id,
+        duration_ms=analysis.duration_ms,
+        loudness=analysis.loudness,
+        peak=analysis.peak,
+        sample_rate=analysis.sample_rate,
+        start_frame=analysis.start_frame,
+        end_frame=analysis.end_frame,
+        waveform=analysis.waveform,
+        fingerprint=fingerprint or hash_file(path),
+    )
+
+
+def build_new_sound(path: Path, category_id: int) -> Sound | None:
+    # Hashing is much cheaper than decoding, so files whose content is
+    # already in the library are not analyzed at all
+    fingerprint = hash_file(path)
+    if fingerprint in _known_fingerprints:
+        return None
+    return build_sound(path, category_id, fingerprint)
+
+
+class Importer:
+    """Imports sound files in three stages: the paths are consumed lazily
+    (so a directory walk overlaps with everything else), every file is
+    decoded and analyzed in a pool of worker processes, and the results are
+    written from the calling thread only, IMPORT_BATCH_SIZE sounds per
+    bulk_insert() and thus per transaction.
+
+    Duplicates are skipped according to `duplicates`: PATH skips files that
+    are already in the library under the same (normalized) path, CONTENT
+    also skips files with the same fingerprint as a sound in the library or
+    earlier in the same run. Both are set lookups against keys loaded once
+    per run. NONE does no checks of its own, so files with the same content
+    as a sound in the library are added. The same path is never added twice,
+    though: the unique index on it makes bulk_insert() reject such sounds,
+    which are counted in `stats.rejected` and logged.
+
+    on_file is called after every file that was not skipped, with the
+    exception if it failed.
+    Setting `stopsignal` makes run() stop submitting files, cancel the ones
+    that have not started, write what has been analyzed and return."""
+
+    def __init__(
+        self,
+        db: "AbstractDb",
+        category_id: int | None = None,
+        jobs: int | None = None,
+        duplicates: DuplicatePolicy = DuplicatePolicy.PATH,
+        batch_size: int = IMPORT_BATCH_SIZE,
+        on_file: Callable[[Path, Exception | None], Any] | None = None,
+        stopsignal: threading.Event | None = None,
+    ):
+        self.db = db
+        self.category_id = category_id
+        self.jobs = jobs or os.cpu_count() or 1
+        self.duplicates = duplicates
+        self.batch_size = batch_size
+        self.on_file = on_file
+        self.stopsignal = stopsignal or threading.Event()
+        self.stats = ImportStats()
+        self._fingerprints: set[str] = set()
+
+    def _flush(self, batch: list[Sound]):
+        if not batch:
+            return
+        try:
+            rejected = self.db.sound_adapter.bulk_insert(batch)
+            self.stats.imported += len(batch) - len(rejected)
+            self.stats.rejected += len(rejected)
+            for sound in rejected:
+                logger.warning("Not adding %s, which is already in the library", sound.path)
+        except Exception as e:
+            logger.error("Could not write %d imported sounds: %s", len(batch), e)
+            self.stats.failed += len(batch)
+            self.stats.errors.extend((s.path, str(e)) for s in batch)
+        batch.clear()
+
+    def _backfill_fingerprints(self, keys: list[tuple[int, Path, str | None]]) -> list[tuple[int, Path, str | None]]:
+        # Sounds imported before fingerprints existed get theirs now, once
+        missing = {sound_id: path for sound_id, path, fingerprint in keys if fingerprint is None and path.is_file()}
+        if not missing:
+            return keys
+        fingerprints: dict[int, str] = {}
+        with ProcessPoolExecutor(max_workers=self.jobs, mp_context=get_mp_context()) as executor:
+            futures = {executor.submit(hash_file, path): sound_id for sound_id, path in missing.items()}
+            for future, sound_id in futures.items():
+                if self.stopsignal.is_set():
+                    future.cancel()
+                    continue
+                try:
+                    fingerprints[sound_id] = future.result()
+                except OSError as e:
+                    logger.warning("Could not fingerprint %s: %s", missing[sound_id], e)
+        self.db.sound_adapter.set_fingerprints(fingerprints)
+        return [(sound_id, path, fingerprints.get(sound_id, fingerprint)) for sound_id, path, fingerprint in keys]
+
+    def _on_done(self, future: "Future[Sound | None]", path: Path, batch: list[Sound]):
+        error: Exception | None = None
+        try:
+            sound = future.result()
+            if sound is None or sound.fingerprint in self._fingerprints:
+                self.stats.skipped += 1
+                return
+            if self.duplicates == DuplicatePolicy.CONTENT:
+                assert sound.fingerprint is not None
+                self._fingerprints.add(sound.fingerprint)
+            batch.append(sound)
+            self.stats.analyzed += 1
+        except Exception as e:
+            logger.error("Error importing %s", path, exc_info=e)
+            error = e
+            self.stats.failed += 1
+            self.stats.errors.append((path, str(e)))
+        if len(batch) >= self.batch_size:
+            self._flush(batch)
+        if self.on_file:
+            self.on_file(path, error)
+
+    def run(self, paths: Iterable[Path]) -> ImportStats:
+        self.stats = ImportStats(total=len(paths) if isinstance(paths, (list, tuple)) else None)
+        category_id = self.category_id
+        if category_id is None:
+            category_id = self.db.get_or_create_default_category().id
+        assert category_id is not None
+        keys = self.db.sound_adapter.list_keys() if self.duplicates != DuplicatePolicy.NONE else []
+        if self.duplicates == DuplicatePolicy.CONTENT:
+            keys = self._backfill_fingerprints(keys)
+            self._fingerprints = {fingerprint for _, _, fingerprint in keys if fingerprint}
+            worker: Callable[[Path, int], Sound | None] = build_new_sound
+        else:
+            self._fingerprints = set()
+            worker = build_sound
+        seen = {normalize_path(path) for _, path, _ in keys}
+        batch: list[Sound] = []
+        pending: "dict[Future[Sound | None], Path]" = {}
+        path_iter = iter(paths)
+        exhausted = False
+
+        with ProcessPoolExecutor(
+            max_workers=self.jobs,
+            mp_context=get_mp_context(),
+            initializer=_set_known_fingerprints,
+            initargs=(frozenset(self._fingerprints),),
+        ) as executor:
+            try:
+                while True:
+                    # Keep every worker busy, but do not run ahead of them
+                    while not exhausted and len(pending) < self.jobs * 2 and not self.stopsignal.is_set():
+                        path = next(path_iter, None)
+                        if path is None:
+                            exhausted = True
+                            continue
+                        key = normalize_path(path)
+                        if key in seen:
+                            self.stats.skipped += 1
+                            continue
+                        if self.duplicates != DuplicatePolicy.NONE:
+                            seen.add(key)
+                        pending[executor.submit(worker, path, category_id)] = path
+                        self.stats.submitted += 1
+                    if not pending:
+                        break
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self._on_done(future, pending.pop(future), batch)
+                    if self.stopsignal.is_set():
+                        for future in pending:
+                            future.cancel()
+                        pending = {f: p for f, p in pending.items() if not f.cancelled()}
+            finally:
+                self._flush(batch)
+
+        self.stats.finished = time.perf_counter()
+        return self.stats
+
+
+def run_import_job(job: "Job", db: "AbstractDb", paths: Iterable[Path], category_id: int | None = None):
+    """Job target for JobManager. The paths are collected first, so that the
+    job has a total to base its ETA on; cancelling the job stops the walk, or
+    the import within the file(s) currently being analyzed."""
+    collected: list[Path] = []
+    for path in paths:
+        if job.is_cancelled:
+            return
+        collected.append(path)
+    job.set_progress(0, len(collected))
+
+    def on_file(path: Path, error: Exception | None):
+        if error:
+            job.add_error(f"{path.name}: {error}")
+        job.set_progress(importer.stats.skipped + importer.stats.analyzed + importer.stats.failed)
+
+    importer = Importer(db, category_id=category_id, on_file=on_file, stopsignal=job.cancel_event)
+    stats = importer.run(collected)
+    skipped = stats.skipped + stats.rejected
+    job.summary = f"{stats.imported} added, {skipped} skipped, {stats.files_per_second:.1f} files/s"
+    job.set_progress(stats.skipped + stats.analyzed + stats.failed)
@@ -0,0 +1,207 @@
+import enum
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+from soundboard_fuck.utils import format_milliseconds
+
+
+logger = logging.getLogger(__name__)
+
+_job_ids = itertools.count(1)
+
+
+class JobStatus(enum.Enum):
+    QUEUED = "Queued"
+    RUNNING = "Running"
+    DONE = "Done"
+    CANCELLED = "Cancelled"
+    FAILED = "Failed"
+
+
+class Job:
+    """A unit of background work. The target gets the job itself, reports
+    progress through set_progress() and add_error(), and is expected to
+    check `cancel_event` between steps and return early when it is set.
+    Targets run on a thread, so any process pool they start must not fork;
+    use utils.get_mp_context()."""
+    summary: str | None = None
+
+    def __init__(self, title: str, target: Callable[["Job"], Any]):
+        self.id = next(_job_ids)
+        self.title = title
+        self.target = target
+        self.status = JobStatus.QUEUED
+        self.done = 0
+        self.total: int | None = None
+        self.errors: list[str] = []
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.cancel_event = threading.Event()
+        self._on_change: Callable[["Job", bool], Any] | None = None
+
+    @property
+    def elapsed(self) -> float:
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def eta_seconds(self) -> float | None:
+        if not self.total or not self.done or self.status != JobStatus.RUNNING:
+            return None
+        return self.elapsed / self.done * max(self.total - self.done, 0)
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.DONE, JobStatus.CANCELLED, JobStatus.FAILED)
+
+    def add_error(self, error: str):
+        self.errors.append(error)
+        self._changed()
+
+    def cancel(self):
+        self.cancel_event.set()
+        self._changed(force=True)
+
+    def describe(self) -> str:
+        if self.status == JobStatus.QUEUED:
+            text = f"{self.title}: queued"
+        elif self.status == JobStatus.RUNNING:
+            if self.is_cancelled:
+                text = f"{self.title}: cancelling ..."
+            elif self.total:
+                text = f"{self.title}: {self.done}/{self.total} ({self.done * 100 // self.total}%)"
+                eta = self.eta_seconds
+                if eta is not None:
+                    text += f", ETA {format_milliseconds(eta * 1000)}"
+            else:
+                text = f"{self.title}: {self.done} ..."
+        elif self.status == JobStatus.DONE:
+            text = f"{self.title}: {self.summary or f'done ({self.done})'}"
+        else:
+            text = f"{self.title}: {self.status.value.lower()}"
+            if self.summary:
+                text += f", {self.summary}"
+        if self.errors:
+            text += ", 1 error" if len(self.errors) == 1 else f", {len(self.errors)} errors"
+        return text
+
+    def set_progress(self, done: int, total: int | None = None):
+        self.done = done
+        if total is not None:
+            self.total = total
+        self._changed()
+
+    def _changed(self, force: bool = False):
+        if self._on_change:
+            self._on_change(self, force)
+
+
+class JobManager:
+    """Runs submitted jobs one at a time, in order, on a background thread.
+    Listeners are called from that thread on every status change, and with
+    at most `update_rate` progress updates per second in between."""
+    _thread: threading.Thread | None = None
+    current: Job | None = None
+
+    def __init__(self, update_rate: float = 4.0):
+        self.update_interval = 1 / update_rate
+        self._queue: deque[Job] = deque()
+        self._condition = threading.Condition()
+        self._listeners: list[Callable[[Job], Any]] = []
+        self._last_update = 0.0
+        self._stopped = False
+
+    @property
+    def pending(self) -> int:
+        with self._condition:
+            return len(self._queue)
+
+    def add_listener(self, listener: Callable[[Job], Any]):
+        self._listeners.append(listener)
+
+    def cancel(self, job: Job | None = None):
+        """Cancels `job`, or the running one if none is given."""
+        job = job or self.current
+        if job:
+            job.cancel()
+
+    def find(self, title: str) -> Job | None:
+        """Returns the queued or running job with `title` that has not been
+        cancelled, if there is one."""
+        with self._condition:
+            jobs = [self.current, *self._queue]
+        return next((j for j in jobs if j and j.title == title and not j.is_cancelled and not j.is_finished), None)
+
+    def shutdown(self, timeout: float | None = None):
+        with self._condition:
+            self._stopped = True
+            jobs = [*self._queue]
+            self._queue.clear()
+            self._condition.notify_all()
+        for job in jobs:
+            job.cancel()
+        if self.current:
+            self.current.cancel()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def submit(self, title: str, target: Callable[[Job], Any]) -> Job:
+        job = Job(title, target)
+        job._on_change = self._on_change
+        with self._condition:
+            self._queue.append(job)
+            self._condition.notify_all()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="JobManager", daemon=True)
+                self._thread.start()
+        self._notify(job)
+        return job
+
+    def _notify(self, job: Job):
+        self._last_update = time.monotonic()
+        for listener in self._listeners:
+            try:
+                listener(job)
+            except Exception as e:
+                logger.error("Job listener failed", exc_info=e)
+
+    def _on_change(self, job: Job, force: bool):
+        if force or time.monotonic() - self._last_update >= self.update_interval:
+            self._notify(job)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopped:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                job = self._queue.popleft()
+            if job.is_cancelled:
+                job.status = JobStatus.CANCELLED
+                self._notify(job)
+                continue
+
+            self.current = job
+            job.status = JobStatus.RUNNING
+            job.started = time.perf_counter()
+            self._notify(job)
+            try:
+                job.target(job)
+                job.status = JobStatus.CANCELLED if job.is_cancelled else JobStatus.DONE
+            except Exception as e:
+                logger.error("Job %r failed", job.title, exc_info=e)
+                job.errors.append(str(e))
+                job.status = JobStatus.FAILED
+            job.finished = time.perf_counter()
+            self.current = None
+            self._notify(job)
@@ -2,20 +2,58 @@ import argparse
 import curses
 import logging
 import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from contextlib import redirect_stderr, redirect_stdout
+from dataclasses import asdict
 from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator
 
 from soundboard_fuck import log_handler
-from soundboard_fuck.data.sound import Sound
+from soundboard_fuck.constants import SILENCE_THRESHOLD
 from soundboard_fuck.db.sqlitedb import SqliteDb
+from soundboard_fuck.enums import DuplicatePolicy
+from soundboard_fuck.importer import Importer
+from soundboard_fuck.player.analysis import SoundAnalysis, analyze_file
+from soundboard_fuck.player.output.abstractoutput import AbstractOutput
+from soundboard_fuck.player.output.nulloutput import NullOutput
+from soundboard_fuck.player.output.wavfileoutput import WavFileOutput
+from soundboard_fuck.sync import Syncer
 from soundboard_fuck.ui.screen import SoundboardScreen
+from soundboard_fuck.utils import get_mp_context, iterate_sound_paths
+
+
+if TYPE_CHECKING:
+    from soundboard_fuck.data.sound import Sound
 
 
 logger = logging.getLogger(__name__)
 
 
-def main():
-    db = SqliteDb()
+def analyze_in_parallel(
+    sounds: "list[Sound]",
+    jobs: int | None,
+    threshold: float,
+    loudness: bool = True,
+) -> "Iterator[tuple[Sound, SoundAnalysis]]":
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=get_mp_context()) as executor:
+        futures = {executor.submit(analyze_file, s.path, threshold, loudness): s for s in sounds}
+        for future in as_completed(futures):
+            sound = futures[future]
+            try:
+                yield sound, future.result()
+            except Exception as e:
+                logger.error("Error analyzing %s", sound.path, exc_info=e)
+
+
+def get_output(args: argparse.Namespace) -> AbstractOutput | None:
+    if args.output == "null":
+        return NullOutput(realtime=not args.unthrottled)
+    if args.output == "wav":
+        return WavFileOutput(args.output_file, realtime=not args.unthrottled)
+    return None
+
+
+def get_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser()
 
     mutex_group = parser.add_mutually_exclusive_group()
@@ -23,14 +61,79 @@ def main():
     mutex_group.add_argument("--list-sounds", "-ls", action="store_true")
     mutex_group.add_argument("--clear-orphans", action="store_true")
 
+    parser.add_argument(
+        "--output",
+        choices=["pyaudio", "null", "wav"],
+        default="pyaudio",
+        help="Where to send the audio; null discards it, wav writes it to --output-file",
+    )
+    parser.add_argument("--output-file", default="soundboard.wav")
+    parser.add_argument(
+        "--unthrottled",
+        action="store_true",
+        help="With --output null or wav: render as fast as possible instead of in real time",
+    )
+
     subparsers = parser.add_subparsers()
-    add_parser = subparsers.add_parser("add")
+    add_parser = subparsers.add_parser("add", help="Add sound files, or all sound files in directories")
     add_parser.add_argument("path", nargs="+")
     add_parser.set_defaults(subparser="add")
-    add_parser.add_argument("--duplicates", action="store_true", help="Add duplicate sounds")
+    add_parser.add_argument(
+        "--duplicates",
+        action="store_true",
+        help="Deprecated: same as --dedup none. The same file can no longer be added twice.",
+    )
+    add_parser.add_argument(
+        "--dedup",
+        choices=[p.value for p in DuplicatePolicy],
+        default=DuplicatePolicy.PATH.value,
+        help=(
+            "Which files to skip as duplicates: ones already added from the same path (default), also ones with "
+            "the same content as an added sound, or none (but the same file is never added twice)"
+        ),
+    )
     add_parser.add_argument("--category", nargs="?")
+    add_parser.add_argument("--recursive", "-r", action="store_true", help="Also add sounds in subdirectories")
+    add_parser.add_argument("--jobs", "-j", type=int, help="Number of parallel processes (default: CPU count)")
+
+    sync_parser = subparsers.add_parser(
+        "sync",
+        help="Add new and changed sound files in a directory tree, and follow moved ones, since the last sync",
+    )
+    sync_parser.set_defaults(subparser="sync")
+    sync_parser.add_argument("path")
+    sync_parser.add_argument("--category", nargs="?")
+    sync_parser.add_argument("--delete-missing", action="store_true", help="Delete sounds whose files are gone")
+    sync_parser.add_argument("--jobs", "-j", type=int, help="Number of parallel processes (default: CPU count)")
+
+    analyze_parser = subparsers.add_parser(
+        "analyze",
+        help="Measure loudness, peak, leading/trailing silence and waveform of sounds",
+    )
+    analyze_parser.set_defaults(subparser="analyze")
+    analyze_parser.add_argument("--all", action="store_true", help="Also re-analyze already analyzed sounds")
+
+    silence_parser = subparsers.add_parser(
+        "detect-silence",
+        help="Recompute where every sound's leading and trailing silence ends",
+    )
+    silence_parser.set_defaults(subparser="detect-silence")
 
-    args = parser.parse_args()
+    for subparser_ in (analyze_parser, silence_parser):
+        subparser_.add_argument("--jobs", "-j", type=int, help="Number of parallel processes (default: CPU count)")
+        subparser_.add_argument(
+            "--threshold",
+            type=float,
+            default=SILENCE_THRESHOLD,
+            help=f"Silence threshold in dBFS (default: {SILENCE_THRESHOLD})",
+        )
+
+    return parser
+
+
+def main():
+    db = SqliteDb()
+    args = get_parser().parse_args()
     subparser = args.subparser if hasattr(args, "subparser") else None
 
     if args.list_categories:
@@ -47,32 +150,90 @@ def main():
             db.sound_adapter.delete(id=s.id)
             sys.stdout.write(f"Deleted {s.name}\n")
     elif subparser == "add":
-        existing_paths = [s.path for s in db.list_sounds()]
         if args.category:
             category = db.category_adapter.get(id=args.category)
         else:
             category = db.get_or_create_default_category()
-        for path in [Path(p).absolute() for p in args.path]:
-            if not path.is_file():
-                continue
-            if path in existing_paths and not args.duplicates:
-                sys.stderr.write(f"Not adding {path} (duplicate)\n")
-                continue
-            try:
-                db.sound_adapter.insert(
-                    Sound(
-                        name=path.stem,
-                        path=path,
-                        category_id=category.id,
-                        duration_ms=Sound.extract_duration_ms(path),
-                    )
-                )
+        if args.duplicates:
+            sys.stderr.write(
+                "--duplicates is deprecated, and means --dedup none: files with the same content as an added "
+                "sound are added, but a file that is already in the library is not added again\n"
+            )
+
+        def on_file(path: Path, error: Exception | None):
+            if error is None:
                 sys.stdout.write(f"Added {path}\n")
-            except Exception as e:
-                logger.error("Error adding %s", path, exc_info=e)
+
+        importer = Importer(
+            db,
+            category_id=category.id,
+            jobs=args.jobs,
+            duplicates=DuplicatePolicy.NONE if args.duplicates else DuplicatePolicy(args.dedup),
+            on_file=on_file,
+        )
+        stats = importer.run(iterate_sound_paths([Path(p).absolute() for p in args.path], args.recursive))
+        if stats.skipped or stats.rejected:
+            sys.stderr.write(f"Not adding {stats.skipped + stats.rejected} duplicate(s)\n")
+        sys.stdout.write(
+            f"Imported {stats.imported} sounds, {stats.failed} failed, in {stats.elapsed:.1f} s "
+            f"({stats.files_per_second:.1f} files/s)\n"
+        )
+    elif subparser == "sync":
+        path = Path(args.path)
+        if not path.is_dir():
+            sys.stderr.write(f"{path} is not a directory\n")
+            sys.exit(1)
+        if args.category:
+            category = db.category_adapter.get(id=args.category)
+        else:
+            category = db.get_or_create_default_category()
+        stats = Syncer(db, path, category_id=category.id, jobs=args.jobs, delete_missing=args.delete_missing).run()
+        for error_path, error in stats.errors:
+            sys.stderr.write(f"Could not sync {error_path}: {error}\n")
+        sys.stdout.write(
+            f"Synced {stats.scanned} files in {stats.elapsed:.1f} s: {stats.added} added, {stats.updated} updated, "
+            f"{stats.moved} moved, {stats.adopted} already added, {stats.unchanged} unchanged, "
+            f"{stats.failed} failed\n"
+        )
+        if stats.missing:
+            action = "deleted" if args.delete_missing else "kept; use --delete-missing to delete them"
+            sys.stdout.write(f"{stats.missing} sound(s) whose files are gone were {action}\n")
+    elif subparser == "analyze":
+        sounds = [
+            s for s in db.list_sounds()
+            if args.all or s.loudness is None or s.end_frame is None or s.waveform is None
+        ]
+        # Written in one transaction at the end, also if interrupted
+        updates: "list[tuple[Sound, dict[str, Any]]]" = []
+        try:
+            for sound, result in analyze_in_parallel(sounds, args.jobs, args.threshold):
+                updates.append((sound, asdict(result)))
+                loudness = f"{result.loudness:.1f} LUFS" if result.loudness is not None else "silent"
+                peak = f"{result.peak:.1f} dBFS" if result.peak is not None else "-"
+                sys.stdout.write(f"{sound.path}: loudness={loudness}, peak={peak}\n")
+        finally:
+            db.sound_adapter.bulk_update(updates)
+    elif subparser == "detect-silence":
+        updates = []
+        try:
+            for sound, result in analyze_in_parallel(db.list_sounds(), args.jobs, args.threshold, loudness=False):
+                updates.append((
+                    sound,
+                    {
+                        "sample_rate": result.sample_rate,
+                        "start_frame": result.start_frame,
+                        "end_frame": result.end_frame,
+                        "waveform": result.waveform,
+                    },
+                ))
+                start_ms = int(result.start_frame * 1000 / result.sample_rate)
+                end_ms = int(result.end_frame * 1000 / result.sample_rate)
+                sys.stdout.write(f"{sound.path}: audible from {start_ms} ms to {end_ms} ms\n")
+        finally:
+            db.sound_adapter.bulk_update(updates)
     else:
         with redirect_stderr(log_handler), redirect_stdout(log_handler):
-            screen = SoundboardScreen(db=db)
+            screen = SoundboardScreen(db=db, output=get_output(args))
             curses.wrapper(screen.attach_window)
 
 
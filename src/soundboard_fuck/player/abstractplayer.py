@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 from typing import TYPE_CHECKING, Any, Callable
-from uuid import UUID
+
+import numpy as np
 
 from soundboard_fuck.player.playerprogress import PlayerProgress
 from soundboard_fuck.utils import coerce_between
@@ -11,31 +12,92 @@ if TYPE_CHECKING:
 
 
 class AbstractPlayer(ABC):
+    # Subclasses should declare __slots__ as well, call __init__(), and
+    # call _reset_progress() whenever they start over
+    __slots__ = ("_player_progress", "progress")
+    _player_progress: PlayerProgress | None
     sound: "Sound"
     is_playing: bool
-    id: UUID
+    is_finished: bool = False
+    # Linear gain applied by the mixer
+    gain: float = 1.0
+    id: int
     created: int
     on_progress: Callable[[PlayerProgress], Any]
     progress: float
-    last_progress: float | None = None
+
+    def __init__(self):
+        self._player_progress = None
+        self._reset_progress()
+
+    @abstractmethod
+    def finish(self):
+        ...
+
+    @abstractmethod
+    def get_progress(self) -> float | None:
+        """Current position as a fraction of the sound; called by the
+        progress ticker, on its own thread, so it must be cheap."""
+        ...
 
     @abstractmethod
     def play(self):
         ...
 
+    @abstractmethod
+    def read(self, frames: int) -> np.ndarray:
+        ...
+
     @abstractmethod
     def stop(self):
         ...
 
-    def _on_progress(self, progress: float):
+    def recycle(self):
+        """Called once the player has stopped and nothing else refers to it
+        any more."""
+        ...
+
+    def restart(self) -> bool:
+        """Jumps back to the start without leaving the mixer, if possible.
+        Returns False if the caller should stop this player and start a new
+        one instead."""
+        return False
+
+    def _reset_progress(self):
+        self.progress = 0.0
+
+    def _make_progress(self, progress: float) -> PlayerProgress | None:
+        # The same PlayerProgress is updated and handed out every time, also
+        # after the player has been recycled
         progress = round(coerce_between(progress, 0.0, 1.0), 2)
-        if not hasattr(self, "progress") or progress != self.progress:
-            self.progress = progress
-            self.on_progress(
-                PlayerProgress(
-                    player_id=self.id,
-                    sound=self.sound,
-                    created=self.created,
-                    progress=self.progress,
-                )
+        if progress == self.progress:
+            return None
+        self.progress = progress
+        player_progress = self._player_progress
+        if player_progress is None:
+            player_progress = PlayerProgress(
+                player_id=self.id,
+                sound=self.sound,
+                created=self.created,
+                progress=progress,
             )
+            self._player_progress = player_progress
+        else:
+            player_progress.player_id = self.id
+            player_progress.sound = self.sound
+            player_progress.created = self.created
+            player_progress.progress = progress
+        return player_progress
+
+    def _on_progress(self, progress: float):
+        player_progress = self._make_progress(progress)
+        if player_progress:
+            self.on_progress(player_progress)
+
+    def tick(self) -> PlayerProgress | None:
+        """Returns a PlayerProgress if the progress has changed since last
+        time, without calling on_progress."""
+        progress = self.get_progress()
+        if progress is None:
+            return None
+        return self._make_progress(progress)
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from soundboard_fuck.constants import (
+    SILENCE_PADDING_MS,
+    SILENCE_THRESHOLD,
+    WAVEFORM_BUCKETS,
+)
+from soundboard_fuck.player.decoder import decode_file
+from soundboard_fuck.player.loudness import integrated_loudness, sample_peak
+
+
+@dataclass
+class SoundAnalysis:
+    # Frame offsets are in the file's own sample rate; end_frame is exclusive.
+    # Loudness is in LUFS and peak in dBFS, None for silence or when not
+    # measured. The waveform covers the audible range only; see
+    # compute_waveform().
+    sample_rate: int
+    start_frame: int
+    end_frame: int
+    loudness: float | None = None
+    peak: float | None = None
+    waveform: bytes | None = None
+    duration_ms: int | None = None
+
+
+def find_audible_range(samples: np.ndarray, rate: int, threshold: float = SILENCE_THRESHOLD) -> tuple[int, int]:
+    # First and last+1 frame where any channel reaches `threshold` dBFS,
+    # widened by SILENCE_PADDING_MS so that soft attacks and tails survive.
+    # All silent: the whole range is returned, so nothing gets trimmed.
+    if not len(samples):
+        return 0, 0
+    limit = pow(10, threshold / 20)
+    audible = (np.abs(samples) >= limit).any(axis=1)
+    if not audible.any():
+        return 0, len(samples)
+    padding = int(rate * SILENCE_PADDING_MS / 1000)
+    start = int(np.argmax(audible))
+    end = len(audible) - int(np.argmax(audible[::-1]))
+    return max(start - padding, 0), min(end + padding, len(samples))
+
+
+def compute_waveform(samples: np.ndarray, buckets: int = WAVEFORM_BUCKETS) -> bytes | None:
+    # Lowest and highest sample of every bucket, over all channels, as
+    # interleaved int8 (min, max) pairs scaled to +/-127. Sounds shorter than
+    # `buckets` frames repeat frames rather than get fewer buckets.
+    if not len(samples):
+        return None
+    bounds = np.linspace(0, len(samples), buckets, endpoint=False).astype(np.int64)
+    mins = np.minimum.reduceat(samples.min(axis=1), bounds)
+    maxes = np.maximum.reduceat(samples.max(axis=1), bounds)
+    peaks = np.round(np.stack([mins, maxes], axis=1) * 127)
+    return np.clip(peaks, -127, 127).astype(np.int8).tobytes()
+
+
+def analyze_file(path: Path, threshold: float = SILENCE_THRESHOLD, loudness: bool = True) -> SoundAnalysis:
+    source = decode_file(path)
+    start, end = find_audible_range(source.samples, source.rate, threshold)
+    analysis = SoundAnalysis(
+        sample_rate=source.rate,
+        start_frame=start,
+        end_frame=end,
+        waveform=compute_waveform(source.samples[start:end]),
+        duration_ms=int(len(source.samples) * 1000 / source.rate) if source.rate else None,
+    )
+    if loudness:
+        analysis.loudness = integrated_loudness(source.samples, source.rate)
+        analysis.peak = sample_peak(source.samples)
+    return analysis
@@ -0,0 +1,24 @@
+from pathlib import Path
+
+from pydub import AudioSegment
+
+from soundboard_fuck.player.pcm import frames_to_float
+from soundboard_fuck.player.source import ArraySource, MmapWavSource
+from soundboard_fuck.player.wavfile import WavFormatError
+
+
+def decode_file(path: Path) -> ArraySource:
+    fmt = path.suffix.strip(".").lower()
+    if fmt == "wav":
+        try:
+            source = MmapWavSource(str(path))
+        except WavFormatError:
+            pass
+        else:
+            try:
+                return ArraySource(source.read(0, source.frame_count).copy(), source.rate)
+            finally:
+                source.close()
+    segment: AudioSegment = AudioSegment.from_file(file=path, format=fmt)
+    samples = frames_to_float(segment.raw_data, segment.sample_width, segment.channels)
+    return ArraySource(samples, segment.frame_rate)
@@ -0,0 +1,134 @@
+import subprocess
+import threading
+from collections import deque
+from pathlib import Path
+
+import ffmpeg
+import numpy as np
+
+from soundboard_fuck.constants import (
+    STREAM_BUFFER_SECONDS,
+    STREAM_CHUNK_FRAMES,
+)
+from soundboard_fuck.player.source import AudioSource
+
+
+class FfmpegSource(AudioSource):
+    """Decodes a file with an ffmpeg subprocess, straight to float32 in the
+    requested rate and channel count, and buffers at most
+    STREAM_BUFFER_SECONDS of it. Reading is strictly forward and never
+    blocks: if the decoder has fallen behind, read() returns what is there,
+    possibly nothing.
+
+    frame_count is an estimate (from the sound's known duration) until the
+    decoder reaches the end of the file, when it becomes exact."""
+    is_float32 = True
+    is_streaming = True
+    error: Exception | None = None
+
+    def __init__(self, path: Path, rate: int, channels: int, estimated_frame_count: int = 0):
+        self.path = path
+        self.rate = rate
+        self.channels = channels
+        self.frame_count = estimated_frame_count
+        self.max_buffered = int(STREAM_BUFFER_SECONDS * rate)
+        self.eof = False
+        self._chunks: deque[np.ndarray] = deque()
+        # Absolute frame index of the first frame in _chunks[0]
+        self._offset = 0
+        self._buffered = 0
+        self._decoded = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        args = ffmpeg.compile(
+            ffmpeg.input(str(path)).output("pipe:", format="f32le", acodec="pcm_f32le", ac=channels, ar=rate)
+        )
+        self._process = subprocess.Popen(
+            args,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._thread = threading.Thread(target=self._run, name="FfmpegSource", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        assert self._process.stdout is not None
+        frame_size = self.channels * 4
+
+        try:
+            while True:
+                with self._condition:
+                    while self._buffered >= self.max_buffered and not self._closed:
+                        self._condition.wait()
+                    if self._closed:
+                        return
+                data = self._process.stdout.read(STREAM_CHUNK_FRAMES * frame_size)
+                if not data:
+                    break
+                chunk = np.frombuffer(data[:len(data) - len(data) % frame_size], dtype=np.float32)
+                chunk = chunk.reshape(-1, self.channels)
+                with self._condition:
+                    self._chunks.append(chunk)
+                    self._buffered += len(chunk)
+                    self._decoded += len(chunk)
+                    self._condition.notify_all()
+        except Exception as e:
+            self.error = e
+        finally:
+            returncode = self._process.wait()
+            if returncode and not self._closed and self.error is None:
+                self.error = RuntimeError(f"ffmpeg exited with code {returncode} for {self.path}")
+            with self._condition:
+                self.frame_count = self._decoded
+                self.eof = True
+                self._condition.notify_all()
+
+    def close(self):
+        with self._condition:
+            self._closed = True
+            self._chunks.clear()
+            self._buffered = 0
+            self._condition.notify_all()
+        if self._process.poll() is None:
+            self._process.kill()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def is_finished(self, position):
+        return self.eof and position >= self.frame_count
+
+    def read(self, start, frames):
+        with self._condition:
+            # Drop everything before `start`; it will never be asked for again
+            while self._chunks and self._offset + len(self._chunks[0]) <= start:
+                chunk = self._chunks.popleft()
+                self._offset += len(chunk)
+                self._buffered -= len(chunk)
+
+            parts: list[np.ndarray] = []
+            chunk_offset = self._offset
+            position = start
+            end = start + frames
+            for chunk in self._chunks:
+                if position >= end or position < chunk_offset:
+                    break
+                chunk_end = chunk_offset + len(chunk)
+                if position < chunk_end:
+                    part = chunk[position - chunk_offset:min(end, chunk_end) - chunk_offset]
+                    parts.append(part)
+                    position += len(part)
+                chunk_offset = chunk_end
+            self._condition.notify_all()
+
+        if not parts:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
+
+    def wait_until_ready(self, frames: int, timeout: float) -> bool:
+        """Blocks until `frames` frames past the current read position have
+        been decoded, or the decoder has stopped; returns False on timeout."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.eof or self._buffered >= frames, timeout)
@@ -0,0 +1,290 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable
+
+import numpy as np
+
+from soundboard_fuck.player.output.abstractoutput import (
+    AbstractOutput,
+    AbstractOutputStream,
+)
+from soundboard_fuck.player.pcm import convert
+from soundboard_fuck.player.source import ArraySource, AudioSource
+
+
+if TYPE_CHECKING:
+    from soundboard_fuck.player.abstractplayer import AbstractPlayer
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MixerStats:
+    opens: int = 0
+    open_ms: float = 0.0
+    last_open_ms: float | None = None
+    # Sounds started on a stream that was only kept open by keep_open, each
+    # of which would otherwise have had to open one
+    warm_starts: int = 0
+    # Streams re-created after dying on their own
+    reopens: int = 0
+
+    @property
+    def avoided_ms(self) -> float:
+        return self.warm_starts * (self.mean_open_ms or 0.0)
+
+    @property
+    def mean_open_ms(self) -> float | None:
+        return self.open_ms / self.opens if self.opens else None
+
+
+class Mixer:
+    """One callback-driven output stream shared by all playing sounds. On
+    every callback, each voice is pulled for one buffer of frames and the
+    results are summed. The number of frames handed to the output is the
+    clock that drives both progress and end-of-sound.
+
+    The stream runs in the output's native rate and channel layout, as
+    float32. Sources are converted to that format once, when loaded (see
+    conform()), so voices only copy samples. The format is not asked for
+    until something needs it, so that creating a mixer never touches the
+    output.
+
+    Normally the stream ends as soon as there is nothing to play, and the
+    next sound has to wait for a new one to open. With keep_open, it is fed
+    silence instead, so a new sound starts at the next buffer boundary, and
+    a watchdog re-creates it if it dies (e.g. the device went away)."""
+    default_rate: int = 44100
+    default_channels: int = 2
+    frames_per_buffer: int = 2048
+    frames_rendered: int = 0
+    keep_open: bool = False
+    watchdog_interval: float = 1.0
+    stream: AbstractOutputStream | None = None
+    # Called on the audio thread with the peak level of every voice's latest
+    # buffer, so it must be quick
+    on_level: Callable[["AbstractPlayer", float], Any] | None = None
+    _stream_done: bool = False
+
+    def __init__(
+        self,
+        output: AbstractOutput,
+        rate: int | None = None,
+        channels: int | None = None,
+        frames_per_buffer: int | None = None,
+    ):
+        self.output = output
+        self._rate = rate
+        self._channels = channels
+        if frames_per_buffer is not None:
+            self.frames_per_buffer = frames_per_buffer
+        self._voices: "list[AbstractPlayer]" = []
+        self._lock = threading.Lock()
+        self._format_lock = threading.Lock()
+        self._buffer: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        self._scratch: np.ndarray = np.zeros((0, 0), dtype=np.float32)
+        # Voice callbacks (finish, stop) may touch the UI and the database,
+        # so they must never run on the audio thread.
+        self._notifier = ThreadPoolExecutor(max_workers=1)
+        self.stats = MixerStats()
+        self._closed = threading.Event()
+        self._watchdog: threading.Thread | None = None
+
+    @property
+    def channels(self) -> int:
+        return self._get_format()[1]
+
+    @property
+    def rate(self) -> int:
+        return self._get_format()[0]
+
+    @property
+    def voices(self) -> "list[AbstractPlayer]":
+        with self._lock:
+            return list(self._voices)
+
+    def _get_format(self) -> tuple[int, int]:
+        with self._format_lock:
+            if self._rate is None or self._channels is None:
+                rate, channels = self.output.get_format() or (self.default_rate, self.default_channels)
+                if self._rate is None:
+                    self._rate = rate
+                if self._channels is None:
+                    self._channels = channels
+            return self._rate, self._channels
+
+    def _get_buffer(self, frames: int) -> np.ndarray:
+        if len(self._buffer) < frames or self._buffer.shape[1] != self.channels:
+            self._buffer = np.zeros((frames, self.channels), dtype=np.float32)
+            self._scratch = np.zeros((frames, self.channels), dtype=np.float32)
+        buffer = self._buffer[:frames]
+        buffer.fill(0.0)
+        return buffer
+
+    def _idle(self, frames: int) -> np.ndarray | None:
+        # Must be called with _lock held
+        if self.keep_open:
+            return self._get_buffer(frames)
+        self._stream_done = True
+        return None
+
+    def _is_stream_alive(self) -> bool:
+        # Must be called with _lock held
+        return self.stream is not None and not self._stream_done and self.stream.is_active()
+
+    def _notify(self, finished: "list[AbstractPlayer]"):
+        # Progress is not reported from here; see ProgressTicker
+        def notify():
+            for voice in finished:
+                try:
+                    voice.finish()
+                except Exception as e:
+                    logger.error(str(e), exc_info=e)
+
+        if finished:
+            self._notifier.submit(notify)
+
+    def _render(self, frames: int) -> np.ndarray | None:
+        with self._lock:
+            voices = list(self._voices)
+            if not voices:
+                return self._idle(frames)
+
+        try:
+            data = self.mix(voices, frames)
+        except Exception as e:
+            logger.error(str(e), exc_info=e)
+            with self._lock:
+                self._voices.clear()
+                idle = self._idle(frames)
+            self._notify(voices)
+            return idle
+
+        self.frames_rendered += frames
+        return data
+
+    def _open_stream(self) -> AbstractOutputStream | None:
+        # Must be called with _lock held. Returns the old stream, which the
+        # caller should close once the lock is released.
+        old_stream = self.stream
+        if old_stream is not None and not self._stream_done:
+            logger.warning("Output stream stopped unexpectedly; re-opening it")
+            self.stats.reopens += 1
+        self._stream_done = False
+        self.stream = None
+        started = time.perf_counter()
+        self.stream = self.output.open(self.rate, self.channels, self.frames_per_buffer, self._render)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.stats.opens += 1
+        self.stats.open_ms += elapsed_ms
+        self.stats.last_open_ms = elapsed_ms
+        logger.debug("Opened output stream in %.1f ms", elapsed_ms)
+        return old_stream
+
+    def _ensure_stream(self):
+        old_stream: AbstractOutputStream | None = None
+        try:
+            with self._lock:
+                if not self._is_stream_alive():
+                    old_stream = self._open_stream()
+        except Exception as e:
+            # Probably no device right now; the watchdog will try again
+            logger.error("Could not open output stream: %s", e)
+        if old_stream:
+            old_stream.close()
+
+    def _run_watchdog(self):
+        while not self._closed.wait(self.watchdog_interval):
+            if self.keep_open:
+                self._ensure_stream()
+
+    def add(self, voice: "AbstractPlayer"):
+        old_stream: AbstractOutputStream | None = None
+
+        with self._lock:
+            was_idle = not self._voices
+            self._voices.append(voice)
+            if not self._is_stream_alive():
+                try:
+                    old_stream = self._open_stream()
+                except Exception:
+                    self._voices.remove(voice)
+                    raise
+            elif was_idle and self.keep_open:
+                self.stats.warm_starts += 1
+
+        if old_stream:
+            old_stream.close()
+
+    def conform(self, source: AudioSource) -> ArraySource:
+        samples = source.read(0, source.frame_count)
+        return ArraySource(convert(samples, source.rate, self.rate, self.channels), self.rate)
+
+    def is_native(self, source: AudioSource) -> bool:
+        return source.is_float32 and source.rate == self.rate and source.channels == self.channels
+
+    def close(self):
+        self._closed.set()
+        if self._watchdog:
+            self._watchdog.join()
+        with self._lock:
+            voices = list(self._voices)
+            self._voices.clear()
+            stream = self.stream
+            self.stream = None
+        if stream:
+            stream.close()
+        self._notify(voices)
+        self._notifier.shutdown(wait=True)
+
+    def mix(self, voices: "list[AbstractPlayer]", frames: int) -> np.ndarray:
+        buffer = self._get_buffer(frames)
+        finished: "list[AbstractPlayer]" = []
+
+        for voice in voices:
+            samples = voice.read(frames)
+            if voice.gain != 1.0:
+                samples = np.multiply(samples, voice.gain, out=self._scratch[:len(samples)])
+            buffer[:len(samples)] += samples
+            if self.on_level is not None and len(samples):
+                self.on_level(voice, max(float(samples.max()), -float(samples.min())))
+            if voice.is_finished:
+                finished.append(voice)
+
+        if finished:
+            with self._lock:
+                self._voices = [v for v in self._voices if v not in finished]
+            self._notify(finished)
+
+        return np.clip(buffer, -1.0, 1.0, out=buffer)
+
+    def set_frames_per_buffer(self, frames_per_buffer: int):
+        """The buffer size is fixed when a stream is opened, so a running
+        stream is closed, and replaced at once if it is still needed."""
+        with self._lock:
+            self.frames_per_buffer = frames_per_buffer
+            stream = self.stream
+            self.stream = None
+            self._stream_done = True
+            needed = bool(self._voices) or self.keep_open
+        if stream:
+            stream.close()
+        if needed and not self._closed.is_set():
+            self._ensure_stream()
+
+    def set_keep_open(self, value: bool):
+        """Opens the stream right away if value is True. Outputs that are not
+        realtime would only spin on the silence, so for them this does
+        nothing."""
+        value = value and self.output.realtime
+        self.keep_open = value
+        if not value or self._closed.is_set():
+            return
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._run_watchdog, name="MixerWatchdog", daemon=True)
+            self._watchdog.start()
+        self._ensure_stream()
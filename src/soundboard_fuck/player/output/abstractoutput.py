@@ -0,0 +1,41 @@
+from abc import ABC, abstractmethod
+from typing import Callable
+
+import numpy as np
+
+
+# Called by the output for every buffer it needs, with the number of frames
+# wanted. Returns float32 samples with shape (frames, channels), or None when
+# there is nothing more to play, after which the stream finishes on its own.
+RenderCallback = Callable[[int], np.ndarray | None]
+
+
+class AbstractOutputStream(ABC):
+    @abstractmethod
+    def close(self):
+        """Stops the stream if it is still running and releases it."""
+        ...
+
+    @abstractmethod
+    def is_active(self) -> bool:
+        ...
+
+
+class AbstractOutput(ABC):
+    """Somewhere for the mixer to send its float32 frames. Creating an output
+    must be cheap; any device or file is only opened when first needed."""
+    # False if the output consumes frames as fast as they can be rendered
+    # rather than at the pace of a sound card
+    realtime: bool = True
+
+    def close(self):
+        ...
+
+    def get_format(self) -> tuple[int, int] | None:
+        """Native (rate, channels) of the output, or None if it has no
+        preference."""
+        return None
+
+    @abstractmethod
+    def open(self, rate: int, channels: int, frames_per_buffer: int, render: RenderCallback) -> AbstractOutputStream:
+        ...
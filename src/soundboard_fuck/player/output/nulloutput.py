@@ -0,0 +1,70 @@
+import threading
+import time
+
+import numpy as np
+
+from soundboard_fuck.player.output.abstractoutput import (
+    AbstractOutput,
+    AbstractOutputStream,
+    RenderCallback,
+)
+
+
+class NullOutputStream(AbstractOutputStream):
+    """Pulls buffers from the mixer in a thread of its own, paced to real time
+    if the output says so, and hands them to NullOutput.write()."""
+
+    def __init__(self, output: "NullOutput", rate: int, channels: int, frames_per_buffer: int, render: RenderCallback):
+        self.output = output
+        self.rate = rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+        self.render = render
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="NullOutputStream", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        period = self.frames_per_buffer / self.rate
+        next_time = time.perf_counter()
+
+        while not self._stopped.is_set():
+            data = self.render(self.frames_per_buffer)
+            if data is None:
+                break
+            self.output.write(data, self.rate)
+            if self.output.realtime:
+                next_time += period
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    self._stopped.wait(delay)
+
+    def close(self):
+        self._stopped.set()
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+
+    def is_active(self) -> bool:
+        return self._thread.is_alive() and not self._stopped.is_set()
+
+
+class NullOutput(AbstractOutput):
+    """Throws all frames away, either at the pace a sound card would consume
+    them or, with realtime=False, as fast as they can be rendered."""
+    frames_written: int = 0
+
+    def __init__(self, realtime: bool = True, rate: int | None = None, channels: int | None = None):
+        self.realtime = realtime
+        self.rate = rate
+        self.channels = channels
+
+    def get_format(self):
+        if self.rate and self.channels:
+            return self.rate, self.channels
+        return None
+
+    def open(self, rate, channels, frames_per_buffer, render):
+        return NullOutputStream(self, rate, channels, frames_per_buffer, render)
+
+    def write(self, data: np.ndarray, rate: int):
+        self.frames_written += len(data)
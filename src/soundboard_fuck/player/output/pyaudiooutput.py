@@ -0,0 +1,78 @@
+import logging
+import threading
+
+import pyaudio
+
+from soundboard_fuck.player.output.abstractoutput import (
+    AbstractOutput,
+    AbstractOutputStream,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class PyAudioOutputStream(AbstractOutputStream):
+    def __init__(self, stream: pyaudio.Stream):
+        self.stream = stream
+
+    def close(self):
+        if self.stream.is_active():
+            self.stream.stop_stream()
+        self.stream.close()
+
+    def is_active(self) -> bool:
+        return self.stream.is_active()
+
+
+class PyAudioOutput(AbstractOutput):
+    _p: pyaudio.PyAudio | None
+
+    def __init__(self, p: pyaudio.PyAudio | None = None):
+        self._p = p
+        self._lock = threading.Lock()
+
+    @property
+    def p(self) -> pyaudio.PyAudio:
+        # Initializing PortAudio probes every host API and device, which is
+        # slow and fails outright on machines without sound, so it is put
+        # off until something actually needs it.
+        with self._lock:
+            if self._p is None:
+                self._p = pyaudio.PyAudio()
+            return self._p
+
+    def close(self):
+        with self._lock:
+            if self._p is not None:
+                self._p.terminate()
+                self._p = None
+
+    def get_format(self):
+        try:
+            info = self.p.get_default_output_device_info()
+            rate = int(info["defaultSampleRate"])
+            channels = min(int(info["maxOutputChannels"]), 2)
+            if rate > 0 and channels > 0:
+                return rate, channels
+        except Exception as e:
+            logger.error("Could not get output device info: %s", e)
+        return None
+
+    def open(self, rate, channels, frames_per_buffer, render):
+        def callback(in_data, frame_count, time_info, status):
+            data = render(frame_count)
+            if data is None:
+                return bytes(frame_count * channels * 4), pyaudio.paComplete
+            return data.tobytes(), pyaudio.paContinue
+
+        return PyAudioOutputStream(
+            self.p.open(
+                format=pyaudio.paFloat32,
+                channels=channels,
+                rate=rate,
+                output=True,
+                frames_per_buffer=frames_per_buffer,
+                stream_callback=callback,
+            )
+        )
@@ -0,0 +1,52 @@
+import threading
+from io import BufferedWriter
+from pathlib import Path
+
+import numpy as np
+
+from soundboard_fuck.player.output.nulloutput import NullOutput
+from soundboard_fuck.player.wavfile import float_wav_header
+
+
+class WavFileOutput(NullOutput):
+    """Writes everything the mixer renders to a float32 WAV file. The file is
+    created when the first frames arrive. Stretches when nothing is playing
+    are only left out while the mixer's stream is closed: with keep_open on
+    (which takes realtime), the silence it renders in between is recorded
+    too."""
+    _file: BufferedWriter | None = None
+    _channels: int = 0
+    _rate: int = 0
+    _data_size: int = 0
+
+    def __init__(
+        self,
+        path: Path | str,
+        realtime: bool = False,
+        rate: int | None = None,
+        channels: int | None = None,
+    ):
+        super().__init__(realtime=realtime, rate=rate, channels=channels)
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.seek(0)
+                self._file.write(float_wav_header(self._channels, self._rate, self._data_size))
+                self._file.close()
+                self._file = None
+
+    def write(self, data, rate):
+        with self._lock:
+            if self._file is None:
+                self._channels = data.shape[1]
+                self._rate = rate
+                self._data_size = 0
+                self._file = open(self.path, "wb")
+                self._file.write(float_wav_header(self._channels, self._rate, 0))
+            frames = np.ascontiguousarray(data, dtype=np.float32).tobytes()
+            self._file.write(frames)
+            self._data_size += len(frames)
+            self.frames_written += len(data)
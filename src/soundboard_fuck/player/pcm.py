@@ -0,0 +1,68 @@
+import numpy as np
+
+
+SAMPLE_DTYPES: dict[int, type[np.integer]] = {
+    1: np.uint8,
+    2: np.int16,
+    4: np.int32,
+}
+
+
+def frames_to_float(data: bytes | memoryview, sample_width: int, channels: int, is_float: bool = False) -> np.ndarray:
+    # Returns float32 samples in [-1.0, 1.0] with shape (frames, channels).
+    # Float32 input is returned as a view on `data`, without copying.
+    if is_float:
+        samples = np.frombuffer(data, dtype=np.float32 if sample_width == 4 else np.float64)
+        if samples.dtype != np.float32:
+            samples = samples.astype(np.float32)
+    elif sample_width == 3:
+        raw = np.frombuffer(data, dtype=np.uint8)
+        raw = raw[:len(raw) - len(raw) % 3].reshape(-1, 3).astype(np.int32)
+        ints = (raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)) << 8
+        samples = ints.astype(np.float32) / 2147483648.0
+    elif sample_width == 1:
+        samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    else:
+        dtype = SAMPLE_DTYPES[sample_width]
+        samples = np.frombuffer(data, dtype=dtype).astype(np.float32) / float(2 ** (sample_width * 8 - 1))
+    samples = samples[:len(samples) - len(samples) % channels]
+    return samples.reshape(-1, channels)
+
+
+def remix(samples: np.ndarray, channels: int) -> np.ndarray:
+    current = samples.shape[1]
+    if current == channels:
+        return samples
+    if current == 1:
+        return np.repeat(samples, channels, axis=1)
+    if channels == 1:
+        return samples.mean(axis=1, keepdims=True, dtype=np.float32)
+    if current > channels:
+        return samples[:, :channels]
+    return np.concatenate([samples, np.repeat(samples[:, -1:], channels - current, axis=1)], axis=1)
+
+
+def interpolate(block: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    # Linear interpolation of `block` (frames, channels) at fractional frame
+    # positions relative to the start of the block.
+    idx: np.ndarray = positions.astype(np.int64)
+    frac = (positions - idx).astype(np.float32)[:, np.newaxis]
+    upper = np.minimum(idx + 1, len(block) - 1)
+    return block[idx] * (1.0 - frac) + block[upper] * frac
+
+
+def resample(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    if src_rate == dst_rate or not len(samples):
+        return samples
+    frames = int(round(len(samples) * dst_rate / src_rate))
+    positions = np.arange(frames, dtype=np.float64) * (src_rate / dst_rate)
+    return interpolate(samples, positions)
+
+
+def convert(samples: np.ndarray, src_rate: int, dst_rate: int, channels: int) -> np.ndarray:
+    # Remix before resampling when reducing channels, after when adding them,
+    # so that resampling always works on as few channels as possible.
+    if samples.shape[1] > channels:
+        samples = remix(samples, channels)
+    samples = remix(resample(samples, src_rate, dst_rate), channels)
+    return np.ascontiguousarray(samples, dtype=np.float32)
@@ -0,0 +1,126 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from soundboard_fuck.constants import PCM_CACHE_MAX_SIZE
+from soundboard_fuck.player.source import ArraySource
+
+
+_Key = tuple[str, int, int]
+
+
+@dataclass
+class PcmCacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    max_size: int
+    entries: int
+    pinned: int
+
+
+@dataclass
+class _Entry:
+    samples: np.ndarray
+    rate: int
+
+    @property
+    def size(self) -> int:
+        return self.samples.nbytes
+
+
+class PcmCache:
+    """Process-wide LRU cache of decoded audio, bounded by total size in
+    bytes. Entries are keyed by (path, mtime, size) so that a file changing
+    on disk is never served stale. Pinned entries count towards the size but
+    are never evicted."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    size: int = 0
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: OrderedDict[_Key, _Entry] = OrderedDict()
+        self._pinned: dict[_Key, _Entry] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, path: Path):
+        try:
+            key = self._get_key(path)
+            return key in self._entries or key in self._pinned
+        except OSError:
+            return False
+
+    @property
+    def stats(self) -> PcmCacheStats:
+        with self._lock:
+            return PcmCacheStats(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                size=self.size,
+                max_size=self.max_size,
+                entries=len(self._entries) + len(self._pinned),
+                pinned=len(self._pinned),
+            )
+
+    def _evict(self, needed: int):
+        while self._entries and self.size + needed > self.max_size:
+            _, entry = self._entries.popitem(last=False)
+            self.size -= entry.size
+            self.evictions += 1
+
+    def _get_key(self, path: Path) -> _Key:
+        stat = os.stat(path)
+        return str(path), stat.st_mtime_ns, stat.st_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._pinned.clear()
+            self.size = 0
+
+    def get(self, path: Path) -> ArraySource | None:
+        key = self._get_key(path)
+        with self._lock:
+            entry = self._pinned.get(key)
+            if entry is None:
+                entry = self._entries.get(key)
+                if entry is None:
+                    self.misses += 1
+                    return None
+                self._entries.move_to_end(key)
+            self.hits += 1
+            return ArraySource(entry.samples, entry.rate)
+
+    def put(self, path: Path, source: ArraySource, pin: bool = False):
+        key = self._get_key(path)
+        entry = _Entry(samples=source.samples, rate=source.rate)
+        if entry.size > self.max_size:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None) or self._pinned.pop(key, None)
+            if old is not None:
+                self.size -= old.size
+            self._evict(entry.size)
+            if pin:
+                self._pinned[key] = entry
+            else:
+                self._entries[key] = entry
+            self.size += entry.size
+
+    def unpin_all(self):
+        # Pinned entries become the most recently used ones
+        with self._lock:
+            self._entries.update(self._pinned)
+            self._pinned.clear()
+            self._evict(0)
+
+
+pcm_cache = PcmCache(max_size=PCM_CACHE_MAX_SIZE)
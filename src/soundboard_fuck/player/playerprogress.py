@@ -1,20 +1,19 @@
 import time
 from dataclasses import dataclass
-from uuid import UUID
 
 from soundboard_fuck.data.sound import Sound
 
 
-@dataclass
+@dataclass(slots=True)
 class PlayerProgress:
-    player_id: UUID
+    player_id: int
     sound: Sound
     created: int
     progress: float
 
     @property
     def remaining_ms(self):
-        return int(self.sound.duration_ms * (1.0 - self.progress))
+        return int(self.sound.audible_duration_ms * (1.0 - self.progress))
 
     @property
     def ends(self):
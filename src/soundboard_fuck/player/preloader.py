@@ -0,0 +1,83 @@
+import logging
+import threading
+from contextlib import redirect_stderr
+from typing import TYPE_CHECKING
+
+from soundboard_fuck import log_handler
+from soundboard_fuck.player.decoder import decode_file
+from soundboard_fuck.player.pcm_cache import PcmCache, pcm_cache
+
+
+if TYPE_CHECKING:
+    from soundboard_fuck.data.sound import Sound
+    from soundboard_fuck.db.abstractdb import AbstractDb
+    from soundboard_fuck.player.mixer import Mixer
+
+
+logger = logging.getLogger(__name__)
+
+
+class Preloader:
+    """Decodes the most played sounds in the background and pins them in the
+    PCM cache, so that their first press is as fast as any later one."""
+    _thread: threading.Thread | None = None
+    # (preload_count, preload_max_size) of the last start()
+    settings: tuple[int, int] | None = None
+
+    def __init__(self, db: "AbstractDb", mixer: "Mixer", cache: PcmCache = pcm_cache):
+        self.db = db
+        self.mixer = mixer
+        self.cache = cache
+        self.stopsignal = threading.Event()
+        self._restart_lock = threading.Lock()
+
+    def _run(self, count: int, max_size: int):
+        budget = min(max_size, self.cache.max_size)
+        used = 0
+
+        with redirect_stderr(log_handler):
+            for sound in self.get_sounds(count):
+                if self.stopsignal.is_set():
+                    break
+                # Skips sounds that would not fit before decoding them; the
+                # estimate is exact for sounds the mixer resamples anyway
+                if sound.duration_ms is not None and used + self.estimate_size(sound) > budget:
+                    continue
+                try:
+                    source = self.mixer.conform(decode_file(sound.path))
+                except Exception as e:
+                    logger.error("Could not preload %s: %s", sound.name, e)
+                    continue
+                size = source.samples.nbytes
+                if used + size > budget:
+                    continue
+                self.cache.put(sound.path, source, pin=True)
+                used += size
+
+    def estimate_size(self, sound: "Sound") -> int:
+        # Bytes of float32 samples in the mixer's format
+        assert sound.duration_ms is not None
+        return sound.duration_ms * self.mixer.rate // 1000 * self.mixer.channels * 4
+
+    def get_sounds(self, count: int) -> "list[Sound]":
+        return self.db.sound_adapter.list_most_played(count)
+
+    def restart(self):
+        """Unpins what was preloaded and preloads again, with the current
+        settings. Blocks until the running preload has stopped."""
+        with self._restart_lock:
+            self.stop()
+            if self._thread:
+                self._thread.join()
+            self.cache.unpin_all()
+            self.start()
+
+    def start(self):
+        meta = self.db.meta_adapter.get()
+        self.settings = (meta.preload_count, meta.preload_max_size)
+        self.stopsignal.clear()
+        self._thread = threading.Thread(target=self._run, args=self.settings, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.stopsignal.set()
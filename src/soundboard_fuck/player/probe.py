@@ -0,0 +1,62 @@
+import logging
+import os
+import wave
+from pathlib import Path
+
+import ffmpeg
+
+from soundboard_fuck.player.decoder import decode_file
+from soundboard_fuck.player.wavfile import WavFormatError, parse_wav_header
+
+
+logger = logging.getLogger(__name__)
+
+
+def _probe_wav(path: Path) -> int | None:
+    try:
+        with open(path, "rb") as f:
+            header = parse_wav_header(f, os.fstat(f.fileno()).st_size)
+        return int(header.frame_count * 1000 / header.rate) if header.rate else None
+    except WavFormatError:
+        pass
+
+    try:
+        with wave.open(str(path), "rb") as wf:
+            rate = wf.getframerate()
+            return int(wf.getnframes() * 1000 / rate) if rate else None
+    except (wave.Error, EOFError):
+        return None
+
+
+def _probe_ffprobe(path: Path) -> int | None:
+    try:
+        info = ffmpeg.probe(str(path), select_streams="a:0")
+    except (ffmpeg.Error, OSError) as e:
+        logger.warning("Could not probe %s: %s", path, e)
+        return None
+
+    streams = info.get("streams") or [{}]
+    # Stream durations are missing from some containers (e.g. Matroska), and
+    # VBR MP3s without a Xing header only have an estimate in the format
+    duration = streams[0].get("duration") or info.get("format", {}).get("duration")
+    try:
+        return int(float(duration) * 1000) if duration not in (None, "N/A") else None
+    except ValueError:
+        return None
+
+
+def probe_duration_ms(path: Path) -> int | None:
+    """Reads the duration from the file's headers: the wave header for WAV
+    files, one ffprobe call for anything else. Only if that does not give a
+    usable duration is the whole file decoded. For when the file is not
+    decoded anyway; imports get the duration from their analysis."""
+    if path.suffix.lower() == ".wav":
+        duration_ms = _probe_wav(path) or _probe_ffprobe(path)
+    else:
+        duration_ms = _probe_ffprobe(path)
+
+    if not duration_ms:
+        source = decode_file(path)
+        duration_ms = int(source.frame_count * 1000 / source.rate)
+
+    return duration_ms
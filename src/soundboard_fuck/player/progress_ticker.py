@@ -0,0 +1,58 @@
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable
+
+from soundboard_fuck.constants import PROGRESS_TICK_RATE
+
+
+if TYPE_CHECKING:
+    from soundboard_fuck.player.mixer import Mixer
+    from soundboard_fuck.player.playerprogress import PlayerProgress
+
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressTicker:
+    """Samples the position of every voice in the mixer at a fixed rate, and
+    hands all of them that have moved to `on_tick` in one go. on_tick is
+    called on every tick where anything is playing, even if no individual
+    voice has moved, since aggregates like the total progress depend on the
+    time as well."""
+    _thread: threading.Thread | None = None
+
+    def __init__(
+        self,
+        mixer: "Mixer",
+        on_tick: "Callable[[list[PlayerProgress]], Any]",
+        rate: float = PROGRESS_TICK_RATE,
+    ):
+        self.mixer = mixer
+        self.on_tick = on_tick
+        self.interval = 1 / rate
+        self.stopsignal = threading.Event()
+
+    def _run(self):
+        while not self.stopsignal.wait(self.interval):
+            voices = self.mixer.voices
+            if not voices:
+                continue
+            progresses: "list[PlayerProgress]" = []
+            for voice in voices:
+                progress = voice.tick()
+                if progress is not None:
+                    progresses.append(progress)
+            try:
+                self.on_tick(progresses)
+            except Exception as e:
+                logger.error(str(e), exc_info=e)
+
+    def start(self):
+        self.stopsignal.clear()
+        self._thread = threading.Thread(target=self._run, name="ProgressTicker", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.stopsignal.set()
+        if self._thread and threading.current_thread() is not self._thread:
+            self._thread.join()
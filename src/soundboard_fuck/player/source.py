@@ -0,0 +1,79 @@
+import wave
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from soundboard_fuck.player.pcm import frames_to_float
+from soundboard_fuck.player.wavfile import MmapWavFile
+
+
+class AudioSource(ABC):
+    rate: int
+    channels: int
+    frame_count: int
+    # True if read() returns stored float32 samples as they are, without
+    # any conversion
+    is_float32: bool = False
+    # True if read() may come up short because the data is not there yet,
+    # rather than because the source has ended
+    is_streaming: bool = False
+
+    @abstractmethod
+    def read(self, start: int, frames: int) -> np.ndarray:
+        """Float32 samples with shape (frames, channels); may be shorter than
+        requested at the end of the source."""
+        ...
+
+    def close(self):
+        ...
+
+    def is_finished(self, position: int) -> bool:
+        return position >= self.frame_count
+
+
+class ArraySource(AudioSource):
+    is_float32 = True
+
+    def __init__(self, samples: np.ndarray, rate: int):
+        self.samples = samples
+        self.rate = rate
+        self.channels = samples.shape[1]
+        self.frame_count = len(samples)
+
+    def read(self, start, frames):
+        return self.samples[start:start + frames]
+
+
+class MmapWavSource(AudioSource):
+    def __init__(self, path: str):
+        self.wav = MmapWavFile(path)
+        self.rate = self.wav.header.rate
+        self.channels = self.wav.header.channels
+        self.frame_count = self.wav.frame_count
+        self.is_float32 = self.wav.header.is_float and self.wav.header.sample_width == 4
+
+    def read(self, start, frames):
+        header = self.wav.header
+        return frames_to_float(self.wav.frames(start, frames), header.sample_width, self.channels, header.is_float)
+
+    def close(self):
+        self.wav.close()
+
+
+class WaveSource(AudioSource):
+    def __init__(self, path: str):
+        self.wf = wave.open(path, "rb")
+        self.rate = self.wf.getframerate()
+        self.channels = self.wf.getnchannels()
+        self.frame_count = self.wf.getnframes()
+        self.sample_width = self.wf.getsampwidth()
+
+    def read(self, start, frames):
+        if start >= self.frame_count:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        if self.wf.tell() != start:
+            self.wf.setpos(start)
+        return frames_to_float(self.wf.readframes(frames), self.sample_width, self.channels)
+
+    def close(self):
+        self.wf.close()
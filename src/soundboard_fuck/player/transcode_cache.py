@@ -0,0 +1,184 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+
+from soundboard_fuck.constants import TRANSCODE_CACHE_MAX_SIZE
+from soundboard_fuck.player.decoder import decode_file
+from soundboard_fuck.player.source import ArraySource
+from soundboard_fuck.player.wavfile import write_float_wav
+from soundboard_fuck.utils import get_transcode_cache_dir, hash_file
+
+
+logger = logging.getLogger(__name__)
+
+
+def _write_entry(entry: Path, source: ArraySource):
+    # Written under a temporary name first, so that an entry is never seen
+    # half-written, by this or any other process
+    with NamedTemporaryFile(dir=entry.parent, suffix=".tmp", delete=False) as f:
+        tmp_path = f.name
+    try:
+        write_float_wav(tmp_path, source.samples, source.rate)
+        os.replace(tmp_path, entry)
+    except Exception:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def transcode_file(directory: Path, path: Path, fingerprint: str | None = None) -> str:
+    """Transcodes `path` into the cache in `directory` unless it is already
+    there, and returns its fingerprint. For worker processes, so it does not
+    evict anything; that is up to the process that owns the cache, which
+    should add_entry() the result."""
+    fingerprint = fingerprint or hash_file(path)
+    entry = directory / f"{fingerprint}.{TranscodeCache.format}"
+    if not entry.exists():
+        _write_entry(entry, decode_file(path))
+    return fingerprint
+
+
+class TranscodeCache:
+    """On-disk cache of sounds transcoded to WAV, under the config dir.
+    Entries hold the decoded audio as it is, in its own rate and channels,
+    and are addressed by a hash of the source file's contents, so the
+    database keeps pointing at the original files and entries can be
+    evicted and rebuilt at any time. The least recently used entries are
+    evicted when the total size exceeds max_size.
+
+    The directory is only listed once; after that, sizes and use are kept
+    track of in memory. Entries written by other processes are picked up
+    by add_entry(), or when they are first asked for."""
+    format: str = "wav"
+
+    def __init__(self, max_size: int, directory: Path | None = None):
+        self.max_size = max_size
+        self._directory = directory
+        self._lock = threading.Lock()
+        # Entry -> size, least recently used first; None until listed
+        self._entries: OrderedDict[Path, int] | None = None
+        self._size = 0
+        # A single writer, so that cache misses do not pile up threads
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="TranscodeCache")
+        self._pending: set[str] = set()
+
+    @property
+    def directory(self) -> Path:
+        if self._directory is None:
+            return get_transcode_cache_dir()
+        return self._directory
+
+    @property
+    def size(self) -> int:
+        with self._lock:
+            self._load_entries()
+            return self._size
+
+    def _add(self, entry: Path, size: int):
+        # Must be called with _lock held
+        entries = self._load_entries()
+        self._size += size - entries.get(entry, 0)
+        entries[entry] = size
+        entries.move_to_end(entry)
+
+    def _get_entry_path(self, path: Path, fingerprint: str | None = None) -> Path:
+        # A fingerprint that is already known saves reading the whole file
+        return self.get_entry_path(fingerprint or hash_file(path))
+
+    def _load_entries(self) -> "OrderedDict[Path, int]":
+        # Must be called with _lock held
+        if self._entries is None:
+            # mtime doubles as "last used", so the order survives restarts
+            stats = [(p, p.stat()) for p in self.directory.glob(f"*.{self.format}")]
+            stats.sort(key=lambda e: e[1].st_mtime)
+            self._entries = OrderedDict((p, stat.st_size) for p, stat in stats)
+            self._size = sum(self._entries.values())
+        return self._entries
+
+    def add_entry(self, fingerprint: str):
+        """Takes account of an entry written by another process."""
+        entry = self.get_entry_path(fingerprint)
+        try:
+            size = entry.stat().st_size
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._add(entry, size)
+
+    def clear(self):
+        with self._lock:
+            for p in self.directory.glob(f"*.{self.format}"):
+                p.unlink(missing_ok=True)
+            self._entries = OrderedDict()
+            self._size = 0
+
+    def evict(self):
+        with self._lock:
+            entries = self._load_entries()
+            while self._size > self.max_size and entries:
+                entry, size = entries.popitem(last=False)
+                entry.unlink(missing_ok=True)
+                self._size -= size
+
+    def get_entry_path(self, fingerprint: str) -> Path:
+        return self.directory / f"{fingerprint}.{self.format}"
+
+    def get(self, path: Path, fingerprint: str | None = None) -> Path | None:
+        entry = self._get_entry_path(path, fingerprint)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            with self._lock:
+                if self._entries is not None and entry in self._entries:
+                    self._size -= self._entries.pop(entry)
+            return None
+        with self._lock:
+            entries = self._load_entries()
+            if entry in entries:
+                entries.move_to_end(entry)
+            else:
+                self._add(entry, entry.stat().st_size)
+        return entry
+
+    def get_or_create(self, path: Path) -> Path:
+        return self.get(path) or self.put(path, decode_file(path))
+
+    def put(self, path: Path, source: ArraySource, fingerprint: str | None = None) -> Path:
+        entry = self._get_entry_path(path, fingerprint)
+        _write_entry(entry, source)
+        with self._lock:
+            self._add(entry, entry.stat().st_size)
+        self.evict()
+        return entry
+
+    def set_directory(self, directory: Path | None):
+        if directory is not None:
+            directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._directory = directory
+            self._entries = None
+            self._size = 0
+
+    def put_in_background(self, path: Path, source: ArraySource, fingerprint: str | None = None):
+        key = fingerprint or str(path)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+
+        def put():
+            try:
+                self.put(path, source, fingerprint)
+            except Exception as e:
+                logger.error("Could not cache transcoded %s: %s", path.name, e)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+        self._writer.submit(put)
+
+
+transcode_cache = TranscodeCache(max_size=TRANSCODE_CACHE_MAX_SIZE)
@@ -0,0 +1,110 @@
+import math
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from soundboard_fuck.enums import VoiceStealing
+
+
+if TYPE_CHECKING:
+    from soundboard_fuck.player.abstractplayer import AbstractPlayer
+
+
+# Voice levels are kept in buckets 6 dB wide, from 0 dBFS down to -90 dBFS
+# and below, so that the quietest voice can be found without sorting.
+LEVEL_BUCKET_DB = 6
+LEVEL_BUCKETS = 16
+
+
+def level_to_bucket(peak: float) -> int:
+    if peak <= 0.0:
+        return 0
+    db = 20 * math.log10(min(peak, 1.0))
+    return max(LEVEL_BUCKETS - 1 - int(-db / LEVEL_BUCKET_DB), 0)
+
+
+class VoicePool:
+    """Keeps track of every voice that has been started and not yet stopped,
+    and decides which one to sacrifice when a new voice would exceed
+    max_voices. All operations are O(1):
+
+    - OLDEST: voices are kept in start order.
+    - SAME_SOUND: each sound has its own start-ordered set of voices; the
+      oldest voice of the sound being started is stolen if there is one,
+      otherwise the oldest voice overall.
+    - QUIETEST: voices are kept in a fixed number of level buckets, updated
+      by the mixer; the voice that has been longest in the lowest non-empty
+      bucket is stolen. Voices that have not produced any sound yet (still
+      loading) count as loudest, so they are not stolen before they get a
+      chance.
+    """
+
+    def __init__(self, max_voices: int, policy: VoiceStealing = VoiceStealing.OLDEST):
+        self.max_voices = max_voices
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._voices: "OrderedDict[int, AbstractPlayer]" = OrderedDict()
+        self._by_sound: "dict[int | None, OrderedDict[int, AbstractPlayer]]" = {}
+        self._buckets: "list[OrderedDict[int, AbstractPlayer]]" = [OrderedDict() for _ in range(LEVEL_BUCKETS)]
+        self._bucket_idx: dict[int, int] = {}
+
+    def __contains__(self, voice: "AbstractPlayer") -> bool:
+        return voice.id in self._voices
+
+    def __len__(self) -> int:
+        return len(self._voices)
+
+    def _add(self, voice: "AbstractPlayer"):
+        self._voices[voice.id] = voice
+        self._by_sound.setdefault(voice.sound.id, OrderedDict())[voice.id] = voice
+        self._buckets[LEVEL_BUCKETS - 1][voice.id] = voice
+        self._bucket_idx[voice.id] = LEVEL_BUCKETS - 1
+
+    def _remove(self, voice: "AbstractPlayer") -> bool:
+        if self._voices.pop(voice.id, None) is None:
+            return False
+        same_sound = self._by_sound[voice.sound.id]
+        del same_sound[voice.id]
+        if not same_sound:
+            del self._by_sound[voice.sound.id]
+        del self._buckets[self._bucket_idx.pop(voice.id)][voice.id]
+        return True
+
+    def _select_victim(self, voice: "AbstractPlayer") -> "AbstractPlayer":
+        if self.policy == VoiceStealing.SAME_SOUND:
+            same_sound = self._by_sound.get(voice.sound.id)
+            if same_sound:
+                return next(iter(same_sound.values()))
+        elif self.policy == VoiceStealing.QUIETEST:
+            for bucket in self._buckets:
+                if bucket:
+                    return next(iter(bucket.values()))
+        return next(iter(self._voices.values()))
+
+    def acquire(self, voice: "AbstractPlayer") -> "list[AbstractPlayer]":
+        """Registers `voice` and returns the voices that had to make room for
+        it, which the caller is expected to stop. Usually empty, and never
+        longer than one item unless max_voices has just been lowered."""
+        stolen: "list[AbstractPlayer]" = []
+
+        with self._lock:
+            while self._voices and len(self._voices) >= max(self.max_voices, 1):
+                victim = self._select_victim(voice)
+                self._remove(victim)
+                stolen.append(victim)
+            self._add(voice)
+
+        return stolen
+
+    def release(self, voice: "AbstractPlayer") -> bool:
+        with self._lock:
+            return self._remove(voice)
+
+    def set_level(self, voice: "AbstractPlayer", peak: float):
+        bucket_idx = level_to_bucket(peak)
+        with self._lock:
+            old_idx = self._bucket_idx.get(voice.id)
+            if old_idx is not None and old_idx != bucket_idx:
+                del self._buckets[old_idx][voice.id]
+                self._buckets[bucket_idx][voice.id] = voice
+                self._bucket_idx[voice.id] = bucket_idx
@@ -0,0 +1,124 @@
+import mmap
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO
+
+import numpy as np
+
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavFormatError(Exception):
+    ...
+
+
+@dataclass
+class WavHeader:
+    audio_format: int
+    channels: int
+    rate: int
+    sample_width: int
+    data_offset: int
+    data_size: int
+
+    @property
+    def frame_size(self) -> int:
+        return self.channels * self.sample_width
+
+    @property
+    def frame_count(self) -> int:
+        return self.data_size // self.frame_size
+
+    @property
+    def is_float(self) -> bool:
+        return self.audio_format == WAVE_FORMAT_IEEE_FLOAT
+
+
+def parse_wav_header(f: BinaryIO, file_size: int) -> WavHeader:
+    riff = f.read(12)
+    if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise WavFormatError("Not a RIFF/WAVE file")
+
+    fmt: tuple[int, int, int, int] | None = None
+
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            raise WavFormatError("No data chunk found")
+        chunk_id, chunk_size = struct.unpack("<4sI", chunk)
+
+        if chunk_id == b"fmt ":
+            body = f.read(chunk_size + (chunk_size & 1))
+            audio_format, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+            if audio_format == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                audio_format = struct.unpack("<H", body[24:26])[0]
+            fmt = (audio_format, channels, rate, (bits + 7) // 8)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise WavFormatError("data chunk before fmt chunk")
+            audio_format, channels, rate, sample_width = fmt
+            if audio_format not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT) or not channels or not sample_width:
+                raise WavFormatError(f"Unsupported WAV format {audio_format:#06x}")
+            data_offset = f.tell()
+            # Streamed WAVs sometimes carry a bogus (e.g. 0xFFFFFFFF) size
+            data_size = min(chunk_size, file_size - data_offset)
+            return WavHeader(audio_format, channels, rate, sample_width, data_offset, data_size)
+        else:
+            f.seek(chunk_size + (chunk_size & 1), 1)
+
+
+class MmapWavFile:
+    """A WAV file whose data chunk is memory mapped. The header is parsed
+    once; frames() then returns zero-copy memoryview slices for any frame
+    range in O(1)."""
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")  # pylint: disable=consider-using-with
+        try:
+            file_size = self._file.seek(0, 2)
+            self._file.seek(0)
+            self.header = parse_wav_header(self._file, file_size)
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        offset = self.header.data_offset
+        self._view = memoryview(self._mmap)[offset:offset + self.header.frame_count * self.header.frame_size]
+
+    @property
+    def frame_count(self) -> int:
+        return self.header.frame_count
+
+    def close(self):
+        try:
+            self._view.release()
+            self._mmap.close()
+        except BufferError:
+            # A slice is still in flight somewhere; the mapping goes away
+            # when it is garbage collected.
+            pass
+        self._file.close()
+
+    def frames(self, start: int, count: int) -> memoryview:
+        frame_size = self.header.frame_size
+        return self._view[start * frame_size:(start + count) * frame_size]
+
+
+def float_wav_header(channels: int, rate: int, data_size: int) -> bytes:
+    fmt = struct.pack("<HHIIHH", WAVE_FORMAT_IEEE_FLOAT, channels, rate, rate * channels * 4, channels * 4, 32)
+    return (
+        b"RIFF" + struct.pack("<I", 4 + 8 + len(fmt) + 8 + data_size) + b"WAVE" +
+        b"fmt " + struct.pack("<I", len(fmt)) + fmt +
+        b"data" + struct.pack("<I", data_size)
+    )
+
+
+def write_float_wav(path: str, samples: np.ndarray, rate: int):
+    # Writes (frames, channels) float32 samples as an IEEE float WAV
+    data = np.ascontiguousarray(samples, dtype=np.float32).tobytes()
+    with open(path, "wb") as f:
+        f.write(float_wav_header(samples.shape[1], rate, len(data)))
+        f.write(data)
@@ -1,113 +1,373 @@
+import itertools
 import logging
+import threading
 import time
-import wave
 from contextlib import redirect_stderr
-from tempfile import NamedTemporaryFile
-from typing import TYPE_CHECKING, Any, Callable
-from uuid import uuid4
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, ClassVar
 
-import pyaudio
-from pydub import AudioSegment
+import numpy as np
 
 from soundboard_fuck import log_handler
+from soundboard_fuck.constants import (
+    FADE_MS,
+    FREE_VOICES_MAX,
+    STREAM_MIN_DURATION_MS,
+)
 from soundboard_fuck.player.abstractplayer import AbstractPlayer
+from soundboard_fuck.player.decoder import decode_file
+from soundboard_fuck.player.ffmpeg_source import FfmpegSource
+from soundboard_fuck.player.pcm_cache import pcm_cache
+from soundboard_fuck.player.source import (
+    AudioSource,
+    MmapWavSource,
+    WaveSource,
+)
+from soundboard_fuck.player.transcode_cache import transcode_cache
+from soundboard_fuck.player.wavfile import WavFormatError
 
 
 if TYPE_CHECKING:
     from soundboard_fuck.data.sound import Sound
+    from soundboard_fuck.player.mixer import Mixer
     from soundboard_fuck.player.playerprogress import PlayerProgress
 
 
+# Player ids are only used as keys, so a counter will do; unlike a UUID, a
+# small int costs nothing to create or hash
+_player_ids = itertools.count(1)
+_ramps: dict[tuple[int, bool], np.ndarray] = {}
+
+
+def get_ramp(frames: int, rising: bool) -> np.ndarray:
+    # Full length ramps from 0 to 1 or 1 to 0, computed once per length;
+    # partial fades use a slice of one
+    key = (frames, rising)
+    ramp = _ramps.get(key)
+    if ramp is None:
+        ramp = np.linspace(0.0 if rising else 1.0, 1.0 if rising else 0.0, frames, dtype=np.float32)
+        _ramps[key] = ramp
+    return ramp
+
+
+class Fade:
+    """A gain ramp that is applied to consecutive reads until it runs out. If
+    `restart` is set, the voice jumps back to its start when it does."""
+    __slots__ = ("ramp", "restart", "done")
+
+    def __init__(self, ramp: np.ndarray, restart: bool = False):
+        self.reset(ramp, restart)
+
+    def reset(self, ramp: np.ndarray, restart: bool = False) -> "Fade":
+        self.ramp = ramp
+        self.restart = restart
+        self.done = 0
+        return self
+
+    @property
+    def level(self) -> float:
+        return float(self.ramp[self.done]) if self.remaining else float(self.ramp[-1])
+
+    @property
+    def remaining(self) -> int:
+        return len(self.ramp) - self.done
+
+    @property
+    def is_rising(self) -> bool:
+        return self.ramp[-1] > self.ramp[0]
+
+    def apply(self, samples: np.ndarray) -> np.ndarray:
+        # Never in place: samples may be a view on a cache or a file
+        ramp = self.ramp[self.done:self.done + len(samples), np.newaxis]
+        self.done += len(samples)
+        return samples * ramp
+
+
 class WavPlayer(AbstractPlayer):
-    stream: pyaudio.Stream | None = None
-    stopsignal: bool = False
+    """Players are meant to be had from get() and handed back with recycle()
+    once nothing refers to them any more, so that playing sounds does not
+    keep creating new ones."""
+    __slots__ = (
+        "sound",
+        "mixer",
+        "gain",
+        "id",
+        "on_stop",
+        "on_progress",
+        "is_playing",
+        "is_finished",
+        "position",
+        "start",
+        "end",
+        "created",
+        "source",
+        "stopsignal",
+        # Set by stop() and restart(), and picked up by read(), so that fades
+        # are only ever touched on the audio thread
+        "_stop_requested",
+        "_restart_requested",
+        "_fade",
+        "_fade_state",
+        "_is_done",
+    )
+    _free: "ClassVar[list[WavPlayer]]" = []
+    _free_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    source: AudioSource | None
+    stopsignal: bool
+    _fade: Fade | None
 
     def __init__(
         self,
         sound: "Sound",
-        p: pyaudio.PyAudio,
+        mixer: "Mixer",
+        on_stop: "Callable[[WavPlayer], Any]",
+        on_progress: "Callable[[PlayerProgress], Any]",
+    ):
+        super().__init__()
+        self._fade_state = Fade(get_ramp(1, False))
+        self.reset(sound, mixer, on_stop, on_progress)
+
+    @classmethod
+    def get(
+        cls,
+        sound: "Sound",
+        mixer: "Mixer",
+        on_stop: "Callable[[WavPlayer], Any]",
+        on_progress: "Callable[[PlayerProgress], Any]",
+    ) -> "WavPlayer":
+        with cls._free_lock:
+            player = cls._free.pop() if cls._free else None
+        if player is None:
+            return cls(sound, mixer, on_stop, on_progress)
+        player.reset(sound, mixer, on_stop, on_progress)
+        return player
+
+    def reset(
+        self,
+        sound: "Sound",
+        mixer: "Mixer",
         on_stop: "Callable[[WavPlayer], Any]",
         on_progress: "Callable[[PlayerProgress], Any]",
     ):
         self.sound = sound
-        self.p = p
-        self.id = uuid4()
+        self.mixer = mixer
+        self.gain = sound.gain
+        self.id = next(_player_ids)
         self.on_stop = on_stop
         self.is_playing = False
+        self.is_finished = False
         self.on_progress = on_progress
-        self.progress = 0.0
+        self._reset_progress()
+        self.position = 0
+        self.start = 0
+        self.end = 0
         self.created = int(time.time() * 1000)
+        self.source = None
+        self.stopsignal = False
+        self._stop_requested = False
+        self._restart_requested = False
+        self._fade = None
+        self._is_done = False
+
+    def recycle(self):
+        """Puts the player on the free list. Only to be called once it has
+        finished, and by whoever holds the last reference to it."""
+        if not self._is_done:
+            return
+        self.source = None
+        with self._free_lock:
+            if len(self._free) < FREE_VOICES_MAX:
+                self._free.append(self)
+
+    def _open_source(self) -> AudioSource:
+        path = self.sound.path
+        source = pcm_cache.get(path)
+
+        if source is None:
+            if self.sound.format == "wav":
+                source = self._open_wav(path)
+            else:
+                transcoded = transcode_cache.get(path, self.sound.fingerprint)
+                if transcoded:
+                    source = self._open_wav(transcoded)
+                else:
+                    stream = self._open_stream(path)
+                    if stream:
+                        return stream
+                    # The cache holds the decoded audio as it is, like the
+                    # entries written by the conversion job
+                    decoded = decode_file(path)
+                    converted = self.mixer.conform(decoded)
+                    pcm_cache.put(path, converted)
+                    transcode_cache.put_in_background(path, decoded, self.sound.fingerprint)
+                    return converted
+
+        if not self.mixer.is_native(source):
+            converted = self.mixer.conform(source)
+            source.close()
+            pcm_cache.put(path, converted)
+            return converted
 
-    def _play(self, path: str):
-        self.is_playing = True
-
-        with wave.open(path, "rb") as wf:
-            assert isinstance(wf, wave.Wave_read)
-
-            frame_rate = wf.getframerate()
-            frame_count = wf.getnframes()
-            sample_format = self.p.get_format_from_width(wf.getsampwidth())
-            sample_size = self.p.get_sample_size(sample_format)
-            channels = wf.getnchannels()
-
-            duration_seconds = frame_rate and frame_count / frame_rate or 0.0
-            start_time: float | None = None
-            stream_time = 0.0
-            chunk_size = int(frame_rate / 10)
-
-            stream = self.p.open(
-                format=sample_format,
-                channels=channels,
-                rate=frame_rate,
-                output=True,
-                frames_per_buffer=chunk_size,
+        return source
+
+    def _open_stream(self, path: Path) -> FfmpegSource | None:
+        # Long compressed sounds are streamed rather than decoded in full,
+        # so that they start as soon as the first chunk is decoded and do
+        # not fill up the PCM cache
+        duration_ms = self.sound.duration_ms
+        if not duration_ms or duration_ms < STREAM_MIN_DURATION_MS:
+            return None
+        try:
+            source = FfmpegSource(
+                path=path,
+                rate=self.mixer.rate,
+                channels=self.mixer.channels,
+                estimated_frame_count=round(duration_ms * self.mixer.rate / 1000),
             )
-            self.stream = stream
-
-            # Troligen ej meningsfullt m lägre readframes() än frams-per-buffer
-            # Värden <= 1024: underruns
-            # 2028 / 2048: 0.02119
-            # 2048 / 4096: 0.02093
-            # Goldilocks zone:
-            # 4096 / 4096: 0.00630
-            # 4096 / 8192: 0.01554
-            # 8192 / 8192: 0.01753
-
-            while not self.stopsignal and len(data := wf.readframes(chunk_size)):
-                num_frames = int(len(data) / (channels * sample_size))
-                stream.write(data, exception_on_underflow=False, num_frames=num_frames)
-                stream_time = stream.get_time()
-                if start_time is None:
-                    start_time = stream_time
-                if duration_seconds:
-                    progress = (stream_time - start_time) / duration_seconds
-                    self._on_progress(progress)
-
-            if progress and progress < 1.0:
-                remains = duration_seconds * (1.0 - progress)
-                for _ in range(int(remains / 0.1) + 1):
-                    time.sleep(0.1)
-                    progress += 0.1 / duration_seconds
-                    self._on_progress(progress)
+        except OSError as e:
+            logging.warning("Could not start ffmpeg, decoding %s in full instead: %s", path, e)
+            return None
+        source.wait_until_ready(self.mixer.frames_per_buffer, timeout=5.0)
+        if source.eof and not source.frame_count:
+            # Let the regular decoder fail with a proper error message
+            source.close()
+            return None
+        return source
+
+    def _make_fade(self, start: float, end: float, restart: bool = False) -> Fade:
+        # A fade from somewhere in between is the tail end of a full one
+        full = max(round(FADE_MS * self.mixer.rate / 1000), 1)
+        frames = min(max(round(full * abs(end - start)), 1), full)
+        return self._fade_state.reset(get_ramp(full, end > start)[-frames:], restart)
+
+    def _open_wav(self, path: Path) -> AudioSource:
+        try:
+            return MmapWavSource(str(path))
+        except WavFormatError:
+            return WaveSource(str(path))
+
+    def finish(self):
+        if self._is_done:
+            return
+        self._is_done = True
+        if self.source:
+            self.source.close()
+        self.is_finished = True
+        self.is_playing = False
+        self._on_progress(1.0)
+        # Must come last, since on_stop may recycle the player
+        self.on_stop(self)
+
+    def get_progress(self):
+        source = self.source
+        if source:
+            end = min(self.end, source.frame_count)
+            if end > self.start:
+                return (self.position - self.start) / (end - self.start)
+        return None
 
     def play(self):
         with redirect_stderr(log_handler):
             try:
-                if self.sound.format != "wav":
-                    segment: AudioSegment = AudioSegment.from_file(file=self.sound.path, format=self.sound.format)
-                    with NamedTemporaryFile("w+b", suffix=".wav") as f:
-                        segment.export(f.name, "wav")
-                        self._play(f.name)
-                else:
-                    self._play(str(self.sound.path))
+                self.source = self._open_source()
+                self.start, self.end = self.sound.get_frame_range(
+                    self.source.rate,
+                    None if self.source.is_streaming else self.source.frame_count,
+                )
+                self.position = self.start
+                if not self.stopsignal:
+                    self.is_playing = True
+                    self.mixer.add(self)
+                    return
             except Exception as e:
                 logging.error(str(e), exc_info=e)
-            finally:
-                if self.stream:
-                    self.stream.close()
-                self._on_progress(1.0)
-                self.on_stop(self)
-                self.is_playing = False
+            self.finish()
+
+    def _read(self, source: AudioSource, frames: int) -> np.ndarray:
+        if self.position >= self.end or source.is_finished(self.position):
+            self.is_finished = True
+            return np.zeros((0, self.mixer.channels), dtype=np.float32)
+
+        samples = source.read(self.position, min(frames, self.end - self.position))
+        self.position += len(samples)
+        if (
+            self.position >= self.end or
+            source.is_finished(self.position) or
+            (not len(samples) and not source.is_streaming)
+        ):
+            self.is_finished = True
+        return samples
+
+    def read(self, frames):
+        source = self.source
+        if self.stopsignal or source is None:
+            self.is_finished = True
+            return np.zeros((0, self.mixer.channels), dtype=np.float32)
+
+        # Both ramps start from wherever the current one has got to, so that
+        # interrupting a fade does not cause a jump in level
+        if self._stop_requested:
+            self._stop_requested = False
+            self._restart_requested = False
+            self._fade = self._make_fade(self._fade.level if self._fade else 1.0, 0.0)
+        elif self._restart_requested:
+            self._restart_requested = False
+            self._fade = self._make_fade(self._fade.level if self._fade else 1.0, 0.0, restart=True)
+
+        if self._fade is None:
+            return self._read(source, frames)
+
+        # A restart fades out and back in within the same buffer, so there
+        # is no gap
+        parts: list[np.ndarray] = []
+        while frames > 0:
+            fade = self._fade
+            if fade is None:
+                parts.append(self._read(source, frames))
+                break
+            samples = self._read(source, min(frames, fade.remaining))
+            frames -= len(samples)
+            if len(samples):
+                parts.append(fade.apply(samples))
+            if not fade.remaining or self.is_finished:
+                if fade.is_rising:
+                    self._fade = None
+                elif fade.restart:
+                    self.position = self.start
+                    self.is_finished = False
+                    self._fade = self._make_fade(fade.level, 1.0)
+                else:
+                    self._fade = None
+                    self.stopsignal = True
+                    self.is_finished = True
+                    break
+            elif not len(samples):
+                break
+
+        if len(parts) == 1:
+            return parts[0]
+        if not parts:
+            return np.zeros((0, self.mixer.channels), dtype=np.float32)
+        return np.concatenate(parts)
+
+    def restart(self):
+        source = self.source
+        if (
+            not self.is_playing or
+            self.is_finished or
+            self.stopsignal or
+            self._stop_requested or
+            source is None or
+            source.is_streaming
+        ):
+            return False
+        self._restart_requested = True
+        return True
 
     def stop(self):
-        self.stopsignal = True
+        if self.is_playing:
+            # Fade out; read() finishes the voice once that is done
+            self._stop_requested = True
+        else:
+            self.stopsignal = True
@@ -1,4 +1,7 @@
+import heapq
+import threading
 import time
+from collections import deque
 from typing import TYPE_CHECKING
 
 
@@ -7,47 +10,105 @@ if TYPE_CHECKING:
     from soundboard_fuck.player.playerprogress import PlayerProgress
 
 
+# How many deleted players to remember, so that progress reports arriving
+# after a player has stopped do not bring it back
+RETIRED_MAX = 256
+
+
 class ProgressCollection:
+    """The latest progress of every playing voice, keyed by player, so that
+    overdubbed instances of a sound are tracked separately.
+
+    The total goes from the start of the earliest voice to the estimated end
+    of the latest one. Both are kept in heaps, with stale entries (deleted
+    players, superseded end estimates) skipped lazily when they reach the
+    top, so that updates are O(log n) and reading the total is amortized
+    O(log n)."""
     _progresses: "dict[int, PlayerProgress]"
+    _by_sound: "dict[int, dict[int, PlayerProgress]]"
+    _ends: dict[int, int]
+    _created_heap: list[tuple[int, int]]
+    _ends_heap: list[tuple[int, int]]
 
     def __init__(self):
         self._progresses = {}
+        self._by_sound = {}
+        self._ends = {}
+        self._created_heap = []
+        self._ends_heap = []
+        self._retired: deque[int] = deque(maxlen=RETIRED_MAX)
+        self._retired_set: set[int] = set()
+        self._lock = threading.Lock()
 
     def __contains__(self, item):
         return item in self._progresses
 
+    def __len__(self):
+        return len(self._progresses)
+
     @property
     def total(self) -> float | None:
-        first = min(self._progresses.values(), key=lambda p: p.created, default=None)
-        last = max(self._progresses.values(), key=lambda p: p.ends, default=None)
+        with self._lock:
+            while self._created_heap and self._created_heap[0][1] not in self._progresses:
+                heapq.heappop(self._created_heap)
+            while self._ends_heap and self._ends.get(self._ends_heap[0][1]) != -self._ends_heap[0][0]:
+                heapq.heappop(self._ends_heap)
+            if not self._created_heap or not self._ends_heap:
+                return None
+            first_created = self._created_heap[0][0]
+            last_ends = -self._ends_heap[0][0]
 
-        if first and last:
-            now = int(time.time() * 1000)
-            total = last.ends - first.created
-            elapsed = now - first.created
-            return elapsed / total
+        now = int(time.time() * 1000)
+        total = last_ends - first_created
+        if total <= 0:
+            return 1.0
+        return (now - first_created) / total
 
-        return None
+    def _compact(self):
+        # Every update pushes a new end estimate, and the old ones are only
+        # dropped once they reach the top, so rebuild now and then
+        if len(self._ends_heap) > 2 * len(self._ends) + 16:
+            self._ends_heap = [(-ends, player_id) for player_id, ends in self._ends.items()]
+            heapq.heapify(self._ends_heap)
 
     def append(self, progress: "PlayerProgress") -> bool:
-        if (
-            not progress.sound.id in self or
-            self._progresses[progress.sound.id].created <= progress.created
-        ):
-            self._progresses[progress.sound.id] = progress
-            return True
-        return False
+        player_id = progress.player_id
+        with self._lock:
+            if player_id in self._retired_set:
+                return False
+            if player_id not in self._progresses:
+                heapq.heappush(self._created_heap, (progress.created, player_id))
+            self._progresses[player_id] = progress
+            self._by_sound.setdefault(progress.sound.id, {})[player_id] = progress
+            ends = progress.ends
+            self._ends[player_id] = ends
+            heapq.heappush(self._ends_heap, (-ends, player_id))
+            self._compact()
+        return True
 
     def get_sound_progress(self, sound_id: int) -> float | None:
-        if sound_id in self:
-            return self._progresses[sound_id].progress
+        """Progress of the most recently started voice of the sound."""
+        with self._lock:
+            progresses = self._by_sound.get(sound_id)
+            if progresses:
+                return max(progresses.values(), key=lambda p: p.created).progress
         return None
 
     def items(self):
         return [(k, v.progress) for k, v in self._progresses.items()]
 
     def delete(self, player: "AbstractPlayer") -> bool:
-        if player.sound.id in self and self._progresses[player.sound.id].player_id == player.id:
-            del self._progresses[player.sound.id]
-            return True
-        return False
+        with self._lock:
+            if len(self._retired) == self._retired.maxlen:
+                self._retired_set.discard(self._retired[0])
+            self._retired.append(player.id)
+            self._retired_set.add(player.id)
+            progress = self._progresses.pop(player.id, None)
+            if progress is None:
+                return False
+            del self._ends[player.id]
+            sound_progresses = self._by_sound[progress.sound.id]
+            del sound_progresses[player.id]
+            if not sound_progresses:
+                del self._by_sound[progress.sound.id]
+        return True
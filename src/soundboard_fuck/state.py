@@ -1,8 +1,10 @@
+import threading
 from abc import ABC
 from typing import TYPE_CHECKING, Any, Callable, Self
 
 from soundboard_fuck.db.abstractdb import AbstractDb
 from soundboard_fuck.enums import RepressMode
+from soundboard_fuck.jobs import Job, JobManager
 from soundboard_fuck.ui.base.screen import Screen
 
 
@@ -11,6 +13,7 @@ if TYPE_CHECKING:
     from soundboard_fuck.data.category_with_sounds import CategoryWithSounds
     from soundboard_fuck.data.meta import Meta
     from soundboard_fuck.data.sound import Sound
+    from soundboard_fuck.player.mixer import MixerStats
 
 
 class AbstractState(ABC):
@@ -40,14 +43,18 @@ class AbstractState(ABC):
 
 class State(AbstractState):
     _resize_listeners: list[Callable]
+    _job_status_timer: threading.Timer | None = None
     categories_with_sounds: "list[CategoryWithSounds]"
+    job_status: str | None = None
     meta: "Meta"
+    mixer_stats: "MixerStats | None" = None
     play_progress: float | None = None
     query: str = ""
     selected_category_id: int | None = None
     selected_sound_id: int | None = None
     selected_sounds: "set[Sound]"
     show_sound_batch_edit: bool = False
+    stolen_voice: "Sound | None" = None
 
     @property
     def is_popup_open(self):
@@ -84,6 +91,8 @@ class State(AbstractState):
         self.selected_sounds = set()
         self.categories_with_sounds = self._db.list_categories_with_sounds()
         self.meta = self._db.meta_adapter.get()
+        self.job_manager = JobManager()
+        self.job_manager.add_listener(self.on_job_change)
 
     def add_resize_listener(self, listener: Callable):
         self._resize_listeners.append(listener)
@@ -109,6 +118,19 @@ class State(AbstractState):
         elif table == "meta":
             self.meta = self._db.meta_adapter.get()
 
+    def on_job_change(self, job: Job):
+        if self._job_status_timer:
+            self._job_status_timer.cancel()
+        self.job_status = job.describe()
+        if job.is_finished and not self.job_manager.pending:
+            # Leave the outcome up for a while, then clear the line
+            self._job_status_timer = threading.Timer(5.0, self._clear_job_status)
+            self._job_status_timer.daemon = True
+            self._job_status_timer.start()
+
+    def _clear_job_status(self):
+        self.job_status = None
+
     def on_resize(self):
         for listener in self._resize_listeners:
             listener()
@@ -0,0 +1,233 @@
+import logging
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from soundboard_fuck.constants import SOUND_EXTENSIONS
+from soundboard_fuck.data.manifest_entry import ManifestEntry
+from soundboard_fuck.importer import build_sound
+from soundboard_fuck.utils import get_mp_context, hash_file, normalize_path
+
+
+if TYPE_CHECKING:
+    from soundboard_fuck.data.sound import Sound
+    from soundboard_fuck.db.sqlitedb import SqliteDb
+
+
+logger = logging.getLogger(__name__)
+
+# Sound fields that come from the file, and are replaced when it changes
+FILE_FIELDS = (
+    "path",
+    "duration_ms",
+    "loudness",
+    "peak",
+    "sample_rate",
+    "start_frame",
+    "end_frame",
+    "waveform",
+    "fingerprint",
+    "transcode_state",
+    "transcode_attempts",
+)
+
+
+@dataclass
+class SyncStats:
+    scanned: int = 0
+    unchanged: int = 0
+    added: int = 0
+    updated: int = 0
+    moved: int = 0
+    adopted: int = 0
+    deleted: int = 0
+    missing: int = 0
+    failed: int = 0
+    errors: list[tuple[Path, str]] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+    finished: float | None = None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+
+@dataclass
+class SyncChanges:
+    # New sounds, each with its manifest entry, whose sound_id is set when
+    # the sound has been inserted
+    new: "list[tuple[Sound, ManifestEntry]]" = field(default_factory=list)
+    # Sound id -> changed fields
+    updated: dict[int, dict[str, Any]] = field(default_factory=dict)
+    deleted_sounds: list[int] = field(default_factory=list)
+    manifest: list[ManifestEntry] = field(default_factory=list)
+    deleted_manifest: list[int] = field(default_factory=list)
+
+    def __bool__(self):
+        return any((self.new, self.updated, self.deleted_sounds, self.manifest, self.deleted_manifest))
+
+
+def scan_directory(root: Path) -> dict[Path, os.stat_result]:
+    # One scandir() per directory; on most platforms the stat results come
+    # with the directory listing
+    files: dict[Path, os.stat_result] = {}
+    stack = [str(root)]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file() and Path(entry.name).suffix.lower().strip(".") in SOUND_EXTENSIONS:
+                        files[normalize_path(Path(entry.path))] = entry.stat()
+                except OSError as e:
+                    logger.warning("Could not stat %s: %s", entry.path, e)
+    return files
+
+
+class Syncer:
+    """Brings the sounds from a directory tree in line with what is in it,
+    using a manifest of the files as they were at the last sync:
+
+    - files with the size and mtime in the manifest are not touched at all
+    - changed files are re-analyzed, and their sounds updated in place
+    - new files with the same content as a vanished one are taken to be that
+      file moved, and only get their path updated
+    - new files that are already in the library (e.g. from `add`) are just
+      added to the manifest
+    - other new files are analyzed and added
+    - vanished files have their sounds deleted if `delete_missing` is set
+
+    Files are hashed and analyzed in a pool of worker processes, and all
+    changes are written in one transaction at the end."""
+
+    def __init__(
+        self,
+        db: "SqliteDb",
+        root: Path,
+        category_id: int | None = None,
+        jobs: int | None = None,
+        delete_missing: bool = False,
+    ):
+        self.db = db
+        self.root = normalize_path(root)
+        self.category_id = category_id
+        self.jobs = jobs or os.cpu_count() or 1
+        self.delete_missing = delete_missing
+        self.stats = SyncStats()
+
+    def _entry(self, path: Path, stat: os.stat_result, fingerprint: str | None, sound_id: int | None = None):
+        return ManifestEntry(
+            root=self.root,
+            path=path,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            fingerprint=fingerprint,
+            sound_id=sound_id,
+        )
+
+    def _fail(self, path: Path, error: Exception):
+        logger.error("Error syncing %s", path, exc_info=error)
+        self.stats.failed += 1
+        self.stats.errors.append((path, str(error)))
+
+    def run(self) -> SyncStats:
+        self.stats = stats = SyncStats()
+        category_id = self.category_id
+        if category_id is None:
+            category_id = self.db.get_or_create_default_category().id
+        assert category_id is not None
+
+        files = scan_directory(self.root)
+        stats.scanned = len(files)
+        entries = {e.path: e for e in self.db.manifest_adapter.list_for_root(self.root)}
+        sounds_by_path: dict[Path, tuple[int, str | None]] = {}
+        sound_ids: set[int] = set()
+        for sound_id, path, fingerprint in self.db.sound_adapter.list_keys():
+            sounds_by_path.setdefault(normalize_path(path), (sound_id, fingerprint))
+            sound_ids.add(sound_id)
+
+        changes = SyncChanges()
+        changed: dict[Path, ManifestEntry] = {}
+        new: list[Path] = []
+        for path, stat in files.items():
+            entry = entries.get(path)
+            if entry is None or entry.sound_id not in sound_ids:
+                if path in sounds_by_path:
+                    sound_id, fingerprint = sounds_by_path[path]
+                    changes.manifest.append(self._entry(path, stat, fingerprint, sound_id))
+                    stats.adopted += 1
+                else:
+                    new.append(path)
+            elif entry.size != stat.st_size or entry.mtime_ns != stat.st_mtime_ns:
+                changed[path] = entry
+            else:
+                stats.unchanged += 1
+        vanished = [e for path, e in entries.items() if path not in files]
+
+        with ProcessPoolExecutor(max_workers=self.jobs, mp_context=get_mp_context()) as executor:
+            # Only new files can be moved ones, and only if something has
+            # vanished; otherwise there is no need to hash before analyzing
+            fingerprints: dict[Path, str] = {}
+            vanished_by_fingerprint = {e.fingerprint: e for e in vanished if e.fingerprint}
+            if vanished_by_fingerprint and new:
+                hash_futures = {executor.submit(hash_file, path): path for path in new}
+                for future in as_completed(hash_futures):
+                    path = hash_futures[future]
+                    try:
+                        fingerprints[path] = future.result()
+                    except Exception as e:
+                        self._fail(path, e)
+                moved: dict[Path, ManifestEntry] = {}
+                for path, fingerprint in fingerprints.items():
+                    moved_from = vanished_by_fingerprint.pop(fingerprint, None)
+                    if moved_from is None or moved_from.sound_id not in sound_ids:
+                        continue
+                    assert moved_from.id is not None and moved_from.sound_id is not None
+                    changes.updated[moved_from.sound_id] = {"path": path}
+                    changes.deleted_manifest.append(moved_from.id)
+                    changes.manifest.append(self._entry(path, files[path], fingerprint, moved_from.sound_id))
+                    moved[path] = moved_from
+                    stats.moved += 1
+                moved_from_ids = {e.id for e in moved.values()}
+                vanished = [e for e in vanished if e.id not in moved_from_ids]
+                new = [p for p in new if p in fingerprints and p not in moved]
+
+            futures: "dict[Future[Sound], Path]" = {
+                executor.submit(build_sound, path, category_id, fingerprints.get(path)): path
+                for path in [*new, *changed]
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    sound = future.result()
+                except Exception as e:
+                    self._fail(path, e)
+                    continue
+                entry = changed.get(path)
+                if entry is not None:
+                    assert entry.sound_id is not None
+                    changes.updated[entry.sound_id] = {name: getattr(sound, name) for name in FILE_FIELDS}
+                    changes.manifest.append(self._entry(path, files[path], sound.fingerprint, entry.sound_id))
+                    stats.updated += 1
+                else:
+                    changes.new.append((sound, self._entry(path, files[path], sound.fingerprint)))
+                    stats.added += 1
+
+        stats.missing = len(vanished)
+        if self.delete_missing:
+            for entry in vanished:
+                assert entry.id is not None
+                if entry.sound_id in sound_ids:
+                    assert entry.sound_id is not None
+                    changes.deleted_sounds.append(entry.sound_id)
+                    stats.deleted += 1
+                changes.deleted_manifest.append(entry.id)
+
+        if changes:
+            self.db.apply_sync(changes)
+        stats.finished = time.perf_counter()
+        return stats
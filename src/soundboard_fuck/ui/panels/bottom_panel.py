@@ -33,7 +33,22 @@ class BottomPanel(AbstractPanel):
         else:
             self.clear_line(0, 1)
 
+        self.print_job_status()
         self.print_progress()
+        self.print_stolen_voice()
+
+    def print_job_status(self):
+        # Right-aligned on the top line, leaving room for the left-hand text
+        status = self.state.job_status
+        if status:
+            text = f" {status[:self.width // 2 - 2]} "
+            self.window.addstr(0, self.width - len(text) - 1, text, ColorPairs.GRAY_ON_DEFAULT.color_pair())
+
+    def print_stolen_voice(self):
+        # Fits in the space to the left of the progress bar
+        sound = self.state.stolen_voice
+        text = f"Stopped {sound.name}" if sound else ""
+        self.window.addstr(1, 1, f"{text:23.23s}", ColorPairs.RED_ON_DEFAULT.color_pair())
 
     def print_progress(self):
         progress = self.state.play_progress
@@ -55,9 +70,12 @@ class BottomPanel(AbstractPanel):
         return PanelPlacement(x=0, y=parent.height - 2, width=parent.width + 1, height=2, parent=parent)
 
     def on_state_change(self, name: str, value: Any):
-        if name in ("selected_sound_id", "selected_sounds", "categories_with_sounds"):
+        if name in ("selected_sound_id", "selected_sounds", "categories_with_sounds", "job_status"):
             self.contents()
             curses.doupdate()
         if name == "play_progress":
             self.print_progress()
             curses.doupdate()
+        if name == "stolen_voice":
+            self.print_stolen_voice()
+            curses.doupdate()
@@ -3,7 +3,7 @@ import curses.ascii
 from pathlib import Path
 from typing import TypedDict
 from soundboard_fuck.constants import SOUND_EXTENSIONS
-from soundboard_fuck.data.sound import Sound
+from soundboard_fuck.importer import run_import_job
 from soundboard_fuck.ui.base.elements.button import Button
 from soundboard_fuck.ui.base.elements.checkbox import Checkbox
 from soundboard_fuck.ui.base.elements.file_select import FileSelect, SimplePath
@@ -11,7 +11,6 @@ from soundboard_fuck.ui.base.elements.input import Input
 from soundboard_fuck.ui.base.panel_placement import CenteredPanelPlacement
 from soundboard_fuck.ui.colors import ColorPair, ColorPairs
 from soundboard_fuck.ui.panels.form_panel import FormPanel
-from soundboard_fuck.ui.panels.status_panel import StatusPanel
 from soundboard_fuck.utils import iterate_directory_sounds
 
 
@@ -116,28 +115,18 @@ class FileSelectionPanel(FormPanel):
             return True
 
         if key.c in (curses.ascii.NL, curses.ascii.SP) and elem_key in ("add_file", "add_dir", "add_dir_recursive"):
-            existing_paths = [s.path for s in self.db.list_sounds()]
-            convert_to_wav = self.db.meta_adapter.get().convert_to_wav
             path = self.path
-            status_panel = StatusPanel(self.state, self.db, "", z_index=4, show_cancel_button=True)
-            self.screen.attach_panel(status_panel)
-
             if elem_key == "add_file":
                 paths = [path]
             else:
                 paths = iterate_directory_sounds(path, elem_key == "add_dir_recursive")
-
-            for p in paths:
-                if Sound.get_final_path(p, convert_to_wav) in existing_paths:
-                    continue
-                if status_panel.check_cancellation():
-                    break
-                status_panel.set_text(f"Importing {p.name} ...")
-                if not status_panel.is_visible:
-                    status_panel.show()
-                self.db.insert_sound(p)
-
-            self.screen.detach_panel(status_panel)
+            self.state.job_manager.submit(
+                f"Importing {path.name}",
+                lambda job: run_import_job(job, self.db, paths),
+            )
+            # Close the popup; the import runs in the background, with its
+            # progress in the bottom panel
+            return False
 
         return super().on_element_keypress(elem_key, element, key)
 
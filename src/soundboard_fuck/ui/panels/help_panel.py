@@ -36,6 +36,7 @@ class HelpPanel(AbstractPanel):
             "Alt+N: Add new category",
             "Alt+S: Settings",
             "Alt+A: Add sounds",
+            "Alt+C: Cancel running import",
         ]
 
     def on_state_change(self, name: str, value: Any):
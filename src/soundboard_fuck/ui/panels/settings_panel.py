@@ -1,23 +1,31 @@
 import curses.ascii
-import enum
 from typing import TypedDict
 
-from soundboard_fuck.db.sqlite.comparison import NotLike
+from soundboard_fuck.conversion import submit_conversion_job
+from soundboard_fuck.enums import VoiceStealing
+from soundboard_fuck.player.pcm_cache import pcm_cache
+from soundboard_fuck.player.transcode_cache import transcode_cache
 from soundboard_fuck.ui.base.elements.button import Button
 from soundboard_fuck.ui.base.elements.checkbox import Checkbox
+from soundboard_fuck.ui.base.elements.input import Input
 from soundboard_fuck.ui.base.panel_placement import CenteredPanelPlacement
 from soundboard_fuck.ui.colors import ColorPairs
 from soundboard_fuck.ui.panels.form_panel import FormPanel
-from soundboard_fuck.utils import get_local_sounds_dir
-
-
-class Phase(enum.Enum):
-    CHANGE_SETTINGS = enum.auto()
-    CONVERT_TO_WAV = enum.auto()
+from soundboard_fuck.ui.voice_stealing_select import VoiceStealingSelect
+from soundboard_fuck.utils import (
+    MEGABYTE,
+    format_filesize,
+    get_transcode_cache_dir,
+)
 
 
 class Elements(TypedDict):
     convert_to_wav: Checkbox
+    preload_count: Input
+    preload_max_size: Input
+    max_polyphony: Input
+    voice_stealing: VoiceStealingSelect
+    keep_output_open: Checkbox
     save: Button
 
 
@@ -25,24 +33,46 @@ class SettingsPanel(FormPanel):
     create_hidden = True
     border = True
     title = "Settings"
-    phase: Phase = Phase.CHANGE_SETTINGS
     is_popup = True
     elements: Elements
 
     def contents(self):
-        if self.phase == Phase.CHANGE_SETTINGS:
-            super().contents()
-            height = self.set_multiline(
-                x=7,
-                y=3,
-                text="Will convert all present and future non-WAV sounds to WAV files for low latency."
+        super().contents()
+        height = self.set_multiline(
+            x=7,
+            y=3,
+            text=(
+                "Will convert all present and future non-WAV sounds to WAV in the background, for low "
+                "latency. Non-WAV sounds are also converted the first time they are played."
+            ),
+        )
+        self.set_line(3, 4 + height, "Location of converted WAV files (original files are untouched):")
+        self.set_multiline(3, 5 + height, str(get_transcode_cache_dir()))
+        mixer_stats = self.state.mixer_stats
+        if mixer_stats and mixer_stats.mean_open_ms is not None:
+            self.set_line(
+                3,
+                self.height - 4,
+                f"Audio output: {mixer_stats.opens} opens, {mixer_stats.mean_open_ms:.0f} ms each; "
+                f"{mixer_stats.warm_starts} avoided ({mixer_stats.avoided_ms / 1000:.1f} s)",
             )
-            self.set_line(3, 5 + height, "Location of converted WAV files:")
-            self.set_multiline(3, 6 + height, str(get_local_sounds_dir()))
-        elif self.phase == Phase.CONVERT_TO_WAV:
-            self.set_multiline(x=3, y=2, text="Converting existing sounds to WAV, this could take a moment ...")
+        stats = pcm_cache.stats
+        self.set_line(
+            3,
+            self.height - 3,
+            f"Decoded audio cache: {format_filesize(stats.size)}/{format_filesize(stats.max_size)}, "
+            f"{stats.hits} hits, {stats.misses} misses, {stats.evictions} evictions",
+        )
+        self.set_line(
+            3,
+            self.height - 2,
+            f"Converted WAV cache: {format_filesize(transcode_cache.size)}/"
+            f"{format_filesize(transcode_cache.max_size)}",
+        )
 
     def create_elements(self):
+        half_width = int(self.width / 2) - 1
+
         return {
             "convert_to_wav": Checkbox(
                 parent=self.window,
@@ -52,35 +82,101 @@ class SettingsPanel(FormPanel):
                 active_color=ColorPairs.BLACK_ON_BLUE,
                 value=self.state.meta.convert_to_wav,
             ),
-            "save": Button(self.window, "Save", 2, 10, active_color=ColorPairs.BLACK_ON_BLUE),
+            "preload_count": Input(
+                parent=self.window,
+                x=2,
+                y=10,
+                width=half_width,
+                label="Preload most played sounds",
+                inactive_color=ColorPairs.DARK_GRAY_ON_DEFAULT,
+                validator=self.validate_number,
+                error_color=ColorPairs.RED_ON_DEFAULT,
+                value=str(self.state.meta.preload_count),
+            ),
+            "preload_max_size": Input(
+                parent=self.window,
+                x=half_width + 3,
+                y=10,
+                width=half_width,
+                label="Preload budget (MB)",
+                inactive_color=ColorPairs.DARK_GRAY_ON_DEFAULT,
+                validator=self.validate_number,
+                error_color=ColorPairs.RED_ON_DEFAULT,
+                value=str(int(self.state.meta.preload_max_size / MEGABYTE)),
+            ),
+            "max_polyphony": Input(
+                parent=self.window,
+                x=2,
+                y=13,
+                width=half_width,
+                label="Max simultaneous sounds",
+                inactive_color=ColorPairs.DARK_GRAY_ON_DEFAULT,
+                validator=self.validate_polyphony,
+                error_color=ColorPairs.RED_ON_DEFAULT,
+                value=str(self.state.meta.max_polyphony),
+            ),
+            "voice_stealing": VoiceStealingSelect(
+                parent=self.window,
+                x=half_width + 3,
+                y=13,
+                inactive_color=ColorPairs.DARK_GRAY_ON_DEFAULT,
+                selected_color=ColorPairs.BLACK_ON_BLUE,
+                value=self.state.meta.voice_stealing,
+                options=list(VoiceStealing),
+            ),
+            "keep_output_open": Checkbox(
+                parent=self.window,
+                x=3,
+                y=17,
+                label="Keep audio output open (starts sounds faster, keeps the device busy)",
+                active_color=ColorPairs.BLACK_ON_BLUE,
+                value=self.state.meta.keep_output_open,
+            ),
+            "save": Button(self.window, "Save", 2, 19, active_color=ColorPairs.BLACK_ON_BLUE),
         }
 
     def get_placement(self, parent):
-        return CenteredPanelPlacement(parent=parent, width=80, height=15)
+        return CenteredPanelPlacement(parent=parent, width=80, height=24)
 
     def on_element_keypress(self, elem_key, element, key):
         if elem_key == "save" and key.c in (curses.ascii.SP, curses.ascii.NL):
+            if any(self.elements[k].error for k in ("preload_count", "preload_max_size", "max_polyphony")):
+                return True
             convert_to_wav = self.elements["convert_to_wav"].get_value()
-            self.db.meta_adapter.update(self.state.meta, convert_to_wav=convert_to_wav)
+            self.db.meta_adapter.update(
+                self.state.meta,
+                convert_to_wav=convert_to_wav,
+                preload_count=int(self.elements["preload_count"].get_value()),
+                preload_max_size=int(self.elements["preload_max_size"].get_value()) * MEGABYTE,
+                max_polyphony=int(self.elements["max_polyphony"].get_value()),
+                voice_stealing=self.elements["voice_stealing"].get_value(),
+                keep_output_open=self.elements["keep_output_open"].get_value(),
+            )
             if convert_to_wav:
-                sounds = self.db.sound_adapter.list(path=NotLike("%.wav"))
-                self.phase = Phase.CONVERT_TO_WAV
-
-                if sounds:
-                    self.redraw(force=True)
-                    for idx, sound in enumerate(sounds):
-                        self.set_line(x=3, y=4, text=f"[{idx + 1}/{len(sounds)}] {sound.name}")
-                        self.redraw()
-                        self.db.copy_sound_to_wav(sound)
-
+                submit_conversion_job(self.state.job_manager, self.db)
             return False
 
         return super().on_element_keypress(elem_key, element, key)
 
     def take(self, key):
         if not self.state.is_popup_open and key.meta and key.s.lower() == "s":
-            self.phase = Phase.CHANGE_SETTINGS
             self.window.clear()
             self.show()
             return True
         return super().take(key)
+
+    def validate_polyphony(self, value: str):
+        try:
+            if int(value) < 1:
+                return "Must be at least 1."
+            return None
+        except ValueError:
+            return "Must be a number."
+
+    def validate_number(self, value: str):
+        try:
+            if int(value) < 0:
+                return "Cannot be negative."
+            return None
+        except ValueError:
+            return "Must be a number."
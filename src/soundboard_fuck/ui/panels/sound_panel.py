@@ -1,18 +1,23 @@
 import curses
 import curses.ascii
+import threading
 from concurrent.futures import ThreadPoolExecutor
 from typing import TYPE_CHECKING, Any
 
-from pyaudio import PyAudio
-
+from soundboard_fuck.conversion import submit_conversion_job
 from soundboard_fuck.data.category import Category
 from soundboard_fuck.data.sound import Sound
 from soundboard_fuck.data.soundlist import SoundList
 from soundboard_fuck.enums import RepressMode
+from soundboard_fuck.player.mixer import Mixer
+from soundboard_fuck.player.preloader import Preloader
+from soundboard_fuck.player.progress_ticker import ProgressTicker
+from soundboard_fuck.player.voice_pool import VoicePool
 from soundboard_fuck.player.wavplayer import WavPlayer
 from soundboard_fuck.progress_collection import ProgressCollection
 from soundboard_fuck.ui.panels.abstract_panel import AbstractPanel
 from soundboard_fuck.ui.base.panel_placement import PanelPlacement
+from soundboard_fuck.ui.waveform import waveform_cells
 from soundboard_fuck.utils import (
     coerce_at_least,
     coerce_at_most,
@@ -24,6 +29,7 @@ from soundboard_fuck.utils import (
 if TYPE_CHECKING:
     from soundboard_fuck.keypress import KeyPress
     from soundboard_fuck.player.abstractplayer import AbstractPlayer
+    from soundboard_fuck.player.output.abstractoutput import AbstractOutput
     from soundboard_fuck.player.playerprogress import PlayerProgress
 
 
@@ -31,10 +37,24 @@ class SoundPanel(AbstractPanel):
     sounds: SoundList
     executor: ThreadPoolExecutor
     currently_playing: "list[AbstractPlayer]"
-    pyaudio: PyAudio
+    output: "AbstractOutput"
+    mixer: Mixer
+    preloader: Preloader
     progresses: ProgressCollection
-
-    def __init__(self, state, db, border=None, z_index=None, create_hidden=None, is_popup=None):
+    ticker: ProgressTicker
+    voice_pool: VoicePool
+    stolen_voice_timer: threading.Timer | None = None
+
+    def __init__(
+        self,
+        state,
+        db,
+        border=None,
+        z_index=None,
+        create_hidden=None,
+        is_popup=None,
+        output: "AbstractOutput | None" = None,
+    ):
         super().__init__(state, db, border, z_index, create_hidden, is_popup)
         self.sounds = SoundList(
             categories_with_sounds=self.state.categories_with_sounds,
@@ -42,8 +62,27 @@ class SoundPanel(AbstractPanel):
         )
         self.currently_playing = []
         self.progresses = ProgressCollection()
-        self.pyaudio = PyAudio()
+        if output is None:
+            # Imported here, so that callers with an output of their own (such
+            # as the benchmark) do not need pyaudio. PyAudioOutput does not
+            # initialize PortAudio until the first sound is played or loaded.
+            from soundboard_fuck.player.output.pyaudiooutput import PyAudioOutput
+            output = PyAudioOutput()
+        self.output = output
+        self.mixer = Mixer(self.output)
+        self.voice_pool = VoicePool(self.state.meta.max_polyphony, self.state.meta.voice_stealing)
+        self.mixer.on_level = self.voice_pool.set_level
+        self.state.mixer_stats = self.mixer.stats
+        self.preloader = Preloader(self.db, self.mixer)
+        self.preloader.start()
+        self.ticker = ProgressTicker(self.mixer, self._on_tick)
+        self.ticker.start()
+        if self.state.meta.convert_to_wav:
+            # Resumes where the last run stopped, if it was interrupted
+            submit_conversion_job(self.state.job_manager, self.db)
         self.executor = ThreadPoolExecutor(max_workers=10)
+        if self.state.meta.keep_output_open:
+            self.executor.submit(self.mixer.set_keep_open, True)
 
     @property
     def max_y(self) -> int:
@@ -79,21 +118,36 @@ class SoundPanel(AbstractPanel):
                 elif self.state.meta.repress_mode == RepressMode.OVERDUB:
                     self._play_sound(selected)
                 elif self.state.meta.repress_mode == RepressMode.RESTART:
-                    self._stop_sound(selected.id)
-                    self._play_sound(selected)
+                    self._restart_sound(selected)
             else:
                 self._play_sound(selected)
         elif isinstance(selected, Category):
             self.db.category_adapter.update(selected, is_expanded=not selected.is_expanded)
 
     def _on_progress(self, progress: "PlayerProgress"):
-        if self.progresses.append(progress):
-            self.state.play_progress = self.progresses.total
-            pos = self.sounds.get_sound_pos_if_visible(progress.sound.id, self.max_y)
-            if pos is not None:
-                selected = self.selected_object
-                self._render_progress(pos, progress.progress, progress.sound, selected == progress.sound)
-                self.redraw()
+        self._on_tick([progress])
+
+    def _on_tick(self, progresses: "list[PlayerProgress]"):
+        # Called by the ticker with every voice that has moved since the last
+        # tick, so that all of them are drawn with a single redraw
+        sounds: "dict[int, Sound]" = {}
+        for progress in progresses:
+            if self.progresses.append(progress):
+                sounds[progress.sound.id] = progress.sound
+        self.state.play_progress = self.progresses.total
+
+        # Several voices may belong to the same sound; its row shows them as
+        # one
+        rendered = False
+        selected = self.selected_object
+        for sound_id, sound in sounds.items():
+            pos = self.sounds.get_sound_pos_if_visible(sound_id, self.max_y)
+            sound_progress = self.progresses.get_sound_progress(sound_id)
+            if pos is not None and sound_progress is not None:
+                self._render_progress(pos, sound_progress, sound, selected == sound)
+                rendered = True
+        if rendered:
+            self.redraw()
 
     def _on_selected_change(self, obj: "Sound | Category | None"):
         if isinstance(obj, Sound):
@@ -104,6 +158,7 @@ class SoundPanel(AbstractPanel):
             self.state.selected_sound_id = None
 
     def _on_stop(self, player: "AbstractPlayer"):
+        self.voice_pool.release(player)
         try:
             self.currently_playing.remove(player)
         except ValueError:
@@ -123,9 +178,13 @@ class SoundPanel(AbstractPanel):
                 pass
         if player.progress >= 0.5:
             self.db.sound_adapter.update(player.sound, play_count=player.sound.play_count + 1)
+        player.recycle()
 
     def _play_sound(self, sound: "Sound"):
-        player = WavPlayer(sound=sound, p=self.pyaudio, on_stop=self._on_stop, on_progress=self._on_progress)
+        player = WavPlayer.get(sound=sound, mixer=self.mixer, on_stop=self._on_stop, on_progress=self._on_progress)
+        for stolen in self.voice_pool.acquire(player):
+            stolen.stop()
+            self._show_stolen_voice(stolen)
         self.currently_playing.append(player)
         self.executor.submit(player.play)
 
@@ -134,11 +193,18 @@ class SoundPanel(AbstractPanel):
             sound.colors.value.regular.inverse.color_pair() if selected
             else sound.colors.value.selected.inverse.color_pair()
         )
-        filled = "█" * round(progress * 20)
+        filler_attr = sound.colors.value.selected.inverse.color_pair()
+        played = round(progress * 20)
+        if sound.waveform:
+            # Played part of the waveform in one colour, the rest in another;
+            # the boundary is the playhead
+            cells = waveform_cells(sound.waveform, 20)
+            filled, filler = cells[:played], cells[played:]
+        else:
+            filled, filler = "█" * played, "░" * (20 - played)
         self.window.addstr(pos, 30, filled, filled_attr)
-        if len(filled) < 20:
-            filler = "░" * (20 - len(filled))
-            self.window.addstr(pos, 30 + len(filled), filler, sound.colors.value.selected.inverse.color_pair())
+        if filler:
+            self.window.addstr(pos, 30 + len(filled), filler, filler_attr)
 
     def _render_object_at_pos(self, pos: int, obj: "Sound | Category | None", selected: bool):
         if obj:
@@ -185,6 +251,27 @@ class SoundPanel(AbstractPanel):
         for y in range(pre_bar + bar_height, pre_bar + bar_height + post_bar):
             self.window.addstr(y, x, "░")
 
+    def _restart_sound(self, sound: "Sound"):
+        # Restart the latest voice in place if it can be, and stop the others
+        players = [p for p in self.currently_playing if p.sound.id == sound.id]
+        restarted = next((p for p in reversed(players) if p.restart()), None)
+        for player in players:
+            if player is not restarted:
+                player.stop()
+        if restarted is None:
+            self._play_sound(sound)
+
+    def _show_stolen_voice(self, player: "AbstractPlayer"):
+        if self.stolen_voice_timer:
+            self.stolen_voice_timer.cancel()
+        self.state.stolen_voice = player.sound
+        self.stolen_voice_timer = threading.Timer(3.0, self._clear_stolen_voice)
+        self.stolen_voice_timer.daemon = True
+        self.stolen_voice_timer.start()
+
+    def _clear_stolen_voice(self):
+        self.state.stolen_voice = None
+
     def _step_page(self, pages: int):
         old_idx = self.sounds.selected_idx or 0
         new_idx = old_idx + (pages * (self.max_y - 1))
@@ -207,7 +294,13 @@ class SoundPanel(AbstractPanel):
             player.stop()
 
     def cleanup(self):
+        if self.stolen_voice_timer:
+            self.stolen_voice_timer.cancel()
+        self.preloader.stop()
+        self.ticker.stop()
         self.stop_all()
+        self.mixer.close()
+        self.output.close()
 
     def contents(self):
         super().contents()
@@ -223,7 +316,14 @@ class SoundPanel(AbstractPanel):
         return PanelPlacement(x=0, y=2, width=parent.width + 1, height=parent.height - 4, parent=parent)
 
     def on_state_change(self, name: str, value: Any):
-        if name == "selected_sounds":
+        if name == "meta":
+            self.voice_pool.max_voices = value.max_polyphony
+            self.voice_pool.policy = value.voice_stealing
+            if value.keep_output_open != self.mixer.keep_open:
+                self.executor.submit(self.mixer.set_keep_open, value.keep_output_open)
+            if (value.preload_count, value.preload_max_size) != self.preloader.settings:
+                self.executor.submit(self.preloader.restart)
+        elif name == "selected_sounds":
             self.redraw(force=True)
         elif name == "categories_with_sounds":
             diff = self.sounds.visible_diff(value, self.max_y)
@@ -18,6 +18,7 @@ from soundboard_fuck.ui.panels.top_panel import TopPanel
 
 if TYPE_CHECKING:
     from soundboard_fuck.db.abstractdb import AbstractDb
+    from soundboard_fuck.player.output.abstractoutput import AbstractOutput
 
 
 class SoundboardScreen(Screen):
@@ -25,9 +26,10 @@ class SoundboardScreen(Screen):
     quit: bool = False
     state: State
 
-    def __init__(self, db: "AbstractDb", border = False):
+    def __init__(self, db: "AbstractDb", border = False, output: "AbstractOutput | None" = None):
         super().__init__(border)
         self.db = db
+        self.output = output
         self.state = State(self.db, self)
         self.state.add_resize_listener(self.on_resize)
 
@@ -38,6 +40,10 @@ class SoundboardScreen(Screen):
             sound.duration_ms = Sound.extract_duration_ms(sound.path)
         self.db.sound_adapter.bulk_insert(sounds)
 
+    def cleanup(self):
+        self.state.job_manager.shutdown(timeout=5.0)
+        super().cleanup()
+
     def create_panels(self):
         return [
             CategoryEditPanel(state=self.state, db=self.db, z_index=2),
@@ -45,7 +51,7 @@ class SoundboardScreen(Screen):
             SoundBatchEditPanel(state=self.state, db=self.db, z_index=2),
             HelpPanel(state=self.state, db=self.db, z_index=2),
             TopPanel(state=self.state, db=self.db),
-            SoundPanel(state=self.state, db=self.db),
+            SoundPanel(state=self.state, db=self.db, output=self.output),
             BottomPanel(state=self.state, db=self.db),
             ErrorPanel(state=self.state, db=self.db, z_index=1),
             SettingsPanel(state=self.state, db=self.db, z_index=2),
@@ -59,6 +65,9 @@ class SoundboardScreen(Screen):
         if key.meta and key.s == "r":
             self.state.cycle_repress_mode()
             return True
+        if key.meta and key.s == "c":
+            self.state.job_manager.cancel()
+            return True
         if key.ctrl and key.s == "d":
             self.quit = True
             return True
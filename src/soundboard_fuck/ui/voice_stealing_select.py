@@ -0,0 +1,9 @@
+from soundboard_fuck.enums import VoiceStealing
+from soundboard_fuck.ui.base.elements.select import Select
+
+
+class VoiceStealingSelect(Select[VoiceStealing]):
+    label = "When out of voices, stop"
+
+    def print_option_label(self, option, window, x, y, width):
+        window.addstr(y, x, f"{option.value:{width}.{width}s}")
@@ -0,0 +1,19 @@
+import functools
+
+import numpy as np
+
+
+LEVELS = "▁▂▃▄▅▆▇█"
+
+
+@functools.lru_cache(maxsize=4096)
+def waveform_cells(waveform: bytes, width: int) -> str:
+    # `width` characters showing the loudest sample within each cell's part of
+    # a waveform from compute_waveform(); cached, since the same few rows are
+    # redrawn many times a second while they play
+    peaks = np.frombuffer(waveform, dtype=np.int8).reshape(-1, 2).astype(np.int16)
+    amplitudes = np.maximum(-peaks[:, 0], peaks[:, 1])
+    bounds = np.linspace(0, len(amplitudes), width, endpoint=False).astype(np.int64)
+    cells = np.maximum.reduceat(amplitudes, bounds)
+    levels = np.clip(np.ceil(cells / 127 * (len(LEVELS) - 1)), 0, len(LEVELS) - 1).astype(np.int64)
+    return "".join(LEVELS[level] for level in levels)
@@ -1,5 +1,10 @@
+import functools
+import hashlib
+import multiprocessing
+import os
 import re
 import string
+from multiprocessing.context import BaseContext
 from pathlib import Path
 from typing import Any, Mapping, Sized, TypeVar, cast
 
@@ -86,12 +91,41 @@ def get_config_dir():
     return path
 
 
-def get_local_sounds_dir():
-    path = get_config_dir() / "sounds"
+def get_transcode_cache_dir():
+    path = get_config_dir() / "transcoded"
     path.mkdir(exist_ok=True)
     return path
 
 
+@functools.lru_cache(maxsize=4096)
+def _hash_file(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(MEGABYTE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_file(path: Path) -> str:
+    # Memoized on (path, mtime, size), so unchanged files are only read once
+    stat = path.stat()
+    return _hash_file(str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def get_mp_context() -> BaseContext:
+    # For process pools. Forking a process that has other threads running
+    # (curses, PortAudio, the mixer, jobs) can leave the child waiting on a
+    # lock that one of them held, so workers must start from a clean process.
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def normalize_path(path: Path) -> Path:
+    # One spelling per file, so that paths can be compared as they are stored
+    return Path(os.path.normcase(os.path.normpath(path.absolute())))
+
+
 def split_to_rows(text: str, width: int):
     text = re.sub(r" {2,}", " ", text)
     hyphensplit: list[str] = [t for t in re.split(r"(.*?-)", text) if t]
@@ -171,3 +205,12 @@ def iterate_directory_sounds(directory: Path, recursive: bool):
     for path in path_generator:
         if path.is_file() and path.suffix.lower().strip(".") in SOUND_EXTENSIONS:
             yield path.absolute()
+
+
+def iterate_sound_paths(paths: list[Path], recursive: bool):
+    # Files as they are, directories expanded to the sound files in them
+    for path in paths:
+        if path.is_dir():
+            yield from iterate_directory_sounds(path, recursive)
+        elif path.is_file():
+            yield path
@@ -0,0 +1,25 @@
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from soundboard_fuck.db.sqlitedb import SqliteDb
+
+
+def write_wav(path: Path, seconds: float = 0.5, frequency: float = 440.0, rate: int = 22050) -> Path:
+    t = np.arange(int(rate * seconds)) / rate
+    samples = (np.sin(2 * np.pi * frequency * t) * 0.5 * 32767).astype(np.int16)
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(samples.tobytes())
+    return path
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch) -> SqliteDb:
+    # The database is created in the working directory
+    monkeypatch.chdir(tmp_path)
+    return SqliteDb()
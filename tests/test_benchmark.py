@@ -0,0 +1,22 @@
+import statistics
+
+from soundboard_fuck.benchmark import Benchmark
+from soundboard_fuck.player.transcode_cache import transcode_cache
+
+
+def test_latency_scales_with_frames_per_buffer(tmp_path):
+    # With background voices playing, a new sound has to wait for the next
+    # buffer, so it must take longer to start with bigger buffers. Every
+    # sample starts from a closed stream, so each one opens a new stream.
+    transcode_cache.set_directory(tmp_path / "transcoded")
+    benchmark = Benchmark(tmp_path, realtime=True)
+    try:
+        results = benchmark.run(["wav"], [512, 8192], ["warm"], [2], repeat=8)
+        opens = benchmark.panel.mixer.stats.opens
+    finally:
+        benchmark.close()
+        transcode_cache.set_directory(None)
+
+    latency = {r["frames_per_buffer"]: statistics.mean(r["samples_ms"]) for r in results}
+    assert opens == 16
+    assert latency[8192] > 4 * latency[512]
@@ -0,0 +1,40 @@
+from conftest import write_wav
+
+from soundboard_fuck.enums import DuplicatePolicy
+from soundboard_fuck.importer import Importer
+
+
+def test_path_policy_skips_files_already_added(db, tmp_path):
+    a = write_wav(tmp_path / "a.wav")
+    b = write_wav(tmp_path / "b.wav", frequency=880.0)
+    Importer(db, jobs=2).run([a])
+
+    stats = Importer(db, jobs=2, duplicates=DuplicatePolicy.PATH).run([a, tmp_path / "x" / ".." / "a.wav", b])
+
+    assert (stats.imported, stats.skipped, stats.rejected) == (1, 2, 0)
+    assert sorted(s.name for s in db.list_sounds()) == ["a", "b"]
+
+
+def test_content_policy_skips_files_with_known_content(db, tmp_path):
+    a = write_wav(tmp_path / "a.wav")
+    copy = tmp_path / "copy.wav"
+    copy.write_bytes(a.read_bytes())
+    other = write_wav(tmp_path / "other.wav", frequency=880.0)
+    Importer(db, jobs=2).run([a])
+
+    stats = Importer(db, jobs=2, duplicates=DuplicatePolicy.CONTENT).run([copy, other])
+
+    assert (stats.imported, stats.skipped) == (1, 1)
+    assert sorted(s.name for s in db.list_sounds()) == ["a", "other"]
+
+
+def test_none_policy_adds_same_content_but_not_same_path(db, tmp_path):
+    a = write_wav(tmp_path / "a.wav")
+    copy = tmp_path / "copy.wav"
+    copy.write_bytes(a.read_bytes())
+    Importer(db, jobs=2).run([a])
+
+    stats = Importer(db, jobs=2, duplicates=DuplicatePolicy.NONE).run([a, copy])
+
+    assert (stats.imported, stats.skipped, stats.rejected) == (1, 0, 1)
+    assert sorted(s.name for s in db.list_sounds()) == ["a", "copy"]
@@ -0,0 +1,21 @@
+from soundboard_fuck.enums import DuplicatePolicy
+from soundboard_fuck.main import get_parser
+
+
+def test_add_duplicates_flag_takes_no_value():
+    args = get_parser().parse_args(["add", "--duplicates", "/tmp/x.wav"])
+    assert args.subparser == "add"
+    assert args.duplicates is True
+    assert args.path == ["/tmp/x.wav"]
+
+
+def test_add_dedup_defaults_to_path():
+    args = get_parser().parse_args(["add", "/tmp/x.wav"])
+    assert args.duplicates is False
+    assert DuplicatePolicy(args.dedup) == DuplicatePolicy.PATH
+
+
+def test_add_dedup_choices():
+    for policy in DuplicatePolicy:
+        args = get_parser().parse_args(["add", "--dedup", policy.value, "/tmp/x.wav"])
+        assert DuplicatePolicy(args.dedup) == policy
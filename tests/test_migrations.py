@@ -0,0 +1,58 @@
+import sqlite3
+
+from soundboard_fuck.db.sqlitedb import SqliteDb
+
+
+def downgrade_to_20(db: SqliteDb):
+    con = sqlite3.connect(db.db_name)
+    con.execute("DROP INDEX sounds_path")
+    con.execute("CREATE INDEX sounds_path ON sounds(path)")
+    con.execute("UPDATE meta SET db_version = 20")
+    con.commit()
+    con.close()
+
+
+def insert(db: SqliteDb, name: str, path: str, play_count: int = 0):
+    category_id = db.get_or_create_default_category().id
+    db.execute(
+        "INSERT INTO sounds (name, path, category_id, play_count) VALUES (?, ?, ?, ?)",
+        (name, path, category_id, play_count),
+    )
+
+
+def test_same_path_sounds_are_set_aside(db, tmp_path):
+    downgrade_to_20(db)
+    insert(db, "a", str(tmp_path / "a.wav"), play_count=3)
+    insert(db, "a2", str(tmp_path / "x" / ".." / "a.wav"), play_count=5)
+    insert(db, "b", str(tmp_path / "b.wav"), play_count=1)
+
+    db = SqliteDb()
+
+    sounds = {s.name: s for s in db.list_sounds()}
+    assert set(sounds) == {"a", "b"}
+    assert sounds["a"].play_count == 3
+    assert sounds["a"].path == tmp_path / "a.wav"
+    con = sqlite3.connect(db.db_name)
+    try:
+        duplicates = con.execute("SELECT name, path, play_count, duplicate_of FROM duplicate_sounds").fetchall()
+        index_sql = con.execute("SELECT sql FROM sqlite_master WHERE name = 'sounds_path'").fetchone()[0]
+        version = con.execute("SELECT db_version FROM meta").fetchone()[0]
+    finally:
+        con.close()
+    assert duplicates == [("a2", str(tmp_path / "x" / ".." / "a.wav"), 5, sounds["a"].id)]
+    assert index_sql.startswith("CREATE UNIQUE INDEX")
+    assert version == db.db_version
+
+
+def test_no_duplicates_table_without_duplicates(db, tmp_path):
+    downgrade_to_20(db)
+    insert(db, "a", str(tmp_path / "a.wav"))
+
+    db = SqliteDb()
+
+    assert [s.name for s in db.list_sounds()] == ["a"]
+    con = sqlite3.connect(db.db_name)
+    try:
+        assert con.execute("SELECT name FROM sqlite_master WHERE name = 'duplicate_sounds'").fetchone() is None
+    finally:
+        con.close()
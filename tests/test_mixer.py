@@ -0,0 +1,82 @@
+import threading
+
+import numpy as np
+
+from soundboard_fuck.player.mixer import Mixer
+from soundboard_fuck.player.output.nulloutput import NullOutput
+
+
+class ConstantVoice:
+    # Just what Mixer uses of a player: `frame_count` frames of `value`
+    def __init__(self, value: float, frame_count: int, channels: int = 2, gain: float = 1.0):
+        self.value = value
+        self.remaining = frame_count
+        self.channels = channels
+        self.gain = gain
+        self.is_finished = False
+        self.finished = threading.Event()
+
+    def read(self, frames: int) -> np.ndarray:
+        frames = min(frames, self.remaining)
+        self.remaining -= frames
+        self.is_finished = not self.remaining
+        return np.full((frames, self.channels), self.value, dtype=np.float32)
+
+    def finish(self):
+        self.finished.set()
+
+
+def get_mixer(output: NullOutput | None = None) -> Mixer:
+    return Mixer(output or NullOutput(realtime=False), rate=8000, channels=2)
+
+
+def test_mix_sums_voices_and_applies_gain():
+    mixer = get_mixer()
+    try:
+        voices = [ConstantVoice(0.25, 100), ConstantVoice(0.5, 100, gain=0.5)]
+        mixed = mixer.mix(voices, 64)
+    finally:
+        mixer.close()
+
+    assert mixed.shape == (64, 2)
+    assert np.allclose(mixed, 0.5)
+
+
+def test_mix_clips_to_full_scale():
+    mixer = get_mixer()
+    try:
+        loud = mixer.mix([ConstantVoice(0.75, 100), ConstantVoice(0.75, 100)], 64).copy()
+        negative = mixer.mix([ConstantVoice(-0.75, 100), ConstantVoice(-0.75, 100)], 64)
+    finally:
+        mixer.close()
+
+    assert np.all(loud == 1.0)
+    assert np.all(negative == -1.0)
+
+
+def test_mix_pads_short_voices_with_silence_and_finishes_them():
+    mixer = get_mixer()
+    voice = ConstantVoice(0.5, 10)
+    try:
+        mixed = mixer.mix([voice], 64)
+        assert voice.finished.wait(1.0)
+    finally:
+        mixer.close()
+
+    assert np.all(mixed[:10] == 0.5)
+    assert np.all(mixed[10:] == 0.0)
+
+
+def test_stream_plays_voices_to_the_end():
+    output = NullOutput(realtime=False)
+    mixer = get_mixer(output)
+    voices = [ConstantVoice(0.5, 5000), ConstantVoice(0.5, 3000)]
+    try:
+        for voice in voices:
+            mixer.add(voice)
+        assert all(v.finished.wait(5.0) for v in voices)
+    finally:
+        mixer.close()
+
+    assert not mixer.voices
+    assert output.frames_written >= 5000